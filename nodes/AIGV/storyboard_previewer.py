@@ -1,12 +1,11 @@
-import torch
 import os
 import json
-import hashlib
-import shutil
-import numpy as np
-from PIL import Image
 import folder_paths
 
+from .._preview import PREVIEW_FORMATS, downscale_frames, frame_fingerprint, save_previews, to_cpu_frames
+from .._preview_links import PREVIEW_LINKS, preview_name
+from .._video_proxy import VIDEO_PROXIES
+
 class StoryboardPreviewer:
     @classmethod
     def INPUT_TYPES(s):
@@ -18,6 +17,14 @@ class StoryboardPreviewer:
                 "video_paths_list": ("STRING,JSON", {"forceInput": True}), 
                 # 修改点 3: 进一步放宽类型，增加 LIST 支持，确保能接收来自 List 节点的输入
                 "shot_content_json": ("STRING,JSON,DICT,LIST", {"forceInput": True}), 
+                # 预览尺寸：卡片缩略图的最长边 (像素)，0 表示原尺寸
+                "preview_size": ("INT", {"default": 0, "min": 0, "max": 8192, "step": 8}),
+                # 预览格式：png 无损；webp / jpeg 编码更快、文件更小
+                "preview_format": (list(PREVIEW_FORMATS.keys()), {"default": "png"}),
+                # 额外保存原尺寸 PNG (供 HTML 导出使用)，仅在缩略图不是原尺寸 PNG 时生效
+                "full_resolution": ("BOOLEAN", {"default": False, "label_on": "Save", "label_off": "Skip"}),
+                # 视频代理尺寸：在后台生成最长边为该值的低分辨率代理供卡片预览，0 表示直接使用原视频
+                "video_proxy_size": ("INT", {"default": 0, "min": 0, "max": 2160, "step": 8}),
             },
             "hidden": {"prompt": "PROMPT", "extra_pnginfo": "EXTRA_PNGINFO"},
         }
@@ -28,9 +35,10 @@ class StoryboardPreviewer:
     FUNCTION = "preview_storyboard"
     CATEGORY = "PixNodes/AIGV"
 
-    def prepare_video_preview(self, video_item):
+    def prepare_video_preview(self, video_item, proxy_size=0):
         """
         将视频路径处理为前端可访问的 temp 文件信息
+        proxy_size > 0 时附带低分辨率代理信息 (见 prepare_video_proxy)
         """
         video_path = None
         
@@ -57,63 +65,96 @@ class StoryboardPreviewer:
             else:
                 return None
 
-        # 2. 准备 Temp 目录的目标路径
-        video_name = os.path.basename(video_path)
-        path_hash = hashlib.md5(video_path.encode('utf-8')).hexdigest()[:8]
-        preview_filename = f"sb_preview_{path_hash}_{video_name}"
-        
-        output_dir = folder_paths.get_temp_directory()
-        preview_path = os.path.join(output_dir, preview_filename)
+        # 2. 链接到 Temp 目录：符号链接/硬链接优先，必要时在后台复制，超出配额按 LRU 淘汰
+        preview = PREVIEW_LINKS.get(video_path, "sb_video")
+        if preview is None:
+            print(f"[StoryboardPreviewer] Failed to link/copy video: {video_path}")
+        elif proxy_size > 0:
+            proxy = self.prepare_video_proxy(video_path, proxy_size)
+            if proxy is not None:
+                preview["proxy"] = proxy
+        return preview
 
-        # 3. 创建链接或复制
-        if not os.path.exists(preview_path):
-            try:
-                if hasattr(os, 'link'):
-                    try:
-                        os.link(video_path, preview_path)
-                    except OSError:
-                        shutil.copy2(video_path, preview_path)
-                else:
-                    shutil.copy2(video_path, preview_path)
-            except Exception as e:
-                print(f"[StoryboardPreviewer] Failed to link/copy video: {e}")
+    def prepare_video_proxy(self, video_path, proxy_size):
+        """
+        请求视频的低分辨率代理，返回 {"filename", "subfolder", "type", "ready"}；OpenCV/编码器不可用时返回 None。
+        代理在后台转码，不阻塞执行：未就绪 (ready=False) 时前端先播放原视频，并轮询代理地址，可访问后切换。
+        """
+        proxy_path, ready = VIDEO_PROXIES.request(video_path, proxy_size,
+                                                  on_ready=lambda path: PREVIEW_LINKS.get(path, "sb_proxy"))
+        if proxy_path is None:
+            return None
+        if ready:
+            info = PREVIEW_LINKS.get(proxy_path, "sb_proxy")
+            if info is None:
                 return None
-
-        # 4. 返回前端可用的结构
-        return {
-            "filename": preview_filename,
-            "type": "temp",
-            "subfolder": "",
-        }
+            info["ready"] = not info.pop("pending")
+            return info
+        # 代理路径在转码前即已确定，链接名可预知
+        return {"filename": preview_name("sb_proxy", os.path.abspath(proxy_path)), "subfolder": "", "type": "temp", "ready": False}
 
     # 修改：参数名从 video_list 更新为 video_paths_list
-    def preview_storyboard(self, image_batch=None, video_paths_list=None, shot_content_json=None, prompt=None, extra_pnginfo=None):
+    def preview_storyboard(self, image_batch=None, video_paths_list=None, shot_content_json=None,
+                           preview_size=None, preview_format=None, full_resolution=None, video_proxy_size=None,
+                           prompt=None, extra_pnginfo=None):
+        # INPUT_IS_LIST = True，控件参数同样以列表形式传入
+        preview_size = preview_size[0] if preview_size else 0
+        preview_format = preview_format[0] if preview_format else "png"
+        full_resolution = full_resolution[0] if full_resolution else False
+        video_proxy_size = video_proxy_size[0] if video_proxy_size else 0
+        if preview_format not in PREVIEW_FORMATS:
+            preview_format = "png"
+
         # 1. 处理图像
+        # 逐帧计算指纹 (基于原图)，文件名由 序号 + 指纹 (+ 预览尺寸) 组成；已存在的预览直接复用 (不做转换和编码)。
+        # 缺失的帧一次性缩小为缩略图，再交给线程池并行编码 (zlib / libwebp / libjpeg 编码时会释放 GIL)
         saved_images = []
+        full_images = []
         if image_batch:
             output_dir = folder_paths.get_temp_directory()
             filename_prefix = "sb_preview"
+            ext = PREVIEW_FORMATS[preview_format][0]
+            # 缩略图不是原尺寸 PNG 时，原图 PNG 只在开启 full_resolution 时写出。
+            # 按扩展名判断：png_fast 在原尺寸下同样是无损 PNG，且与原图同名，不能再写一份
+            is_thumbnail = preview_size > 0 or ext != "png"
+            want_full = is_thumbnail and full_resolution
             img_count = 0
+            pending = []
             for batch_tensor in image_batch:
-                for i in range(batch_tensor.shape[0]):
-                    img_tensor = batch_tensor[i]
-                    img_np = img_tensor.cpu().numpy()
-                    img = Image.fromarray(np.clip(img_np * 255.0, 0, 255).astype(np.uint8))
-                    
-                    img_hash = hashlib.md5(img.tobytes()).hexdigest()[:8]
-                    file_name = f"{filename_prefix}_{img_count}_{img_hash}.png"
-                    full_path = os.path.join(output_dir, file_name)
-                    
-                    if not os.path.exists(full_path):
-                        img.save(full_path, compress_level=4)
-                    
+                frames = to_cpu_frames(batch_tensor)
+                missing, missing_paths = [], []
+                for idx, frame in enumerate(frames):
+                    base_name = f"{filename_prefix}_{img_count}_{frame_fingerprint(frame)}"
+                    file_name = f"{base_name}_{preview_size}.{ext}" if preview_size > 0 else f"{base_name}.{ext}"
+                    preview_path = os.path.join(output_dir, file_name)
+
+                    if not os.path.exists(preview_path):
+                        missing.append(idx)
+                        missing_paths.append(preview_path)
+
                     saved_images.append({
                         "filename": file_name,
                         "subfolder": "",
                         "type": "temp"
                     })
+
+                    full_info = None
+                    if want_full:
+                        full_name = f"{base_name}.png"
+                        full_path = os.path.join(output_dir, full_name)
+                        if not os.path.exists(full_path):
+                            pending.append((frame, full_path, "png"))
+                        full_info = {"filename": full_name, "subfolder": "", "type": "temp"}
+                    full_images.append(full_info)
                     img_count += 1
 
+                if missing:
+                    src = frames if len(missing) == frames.shape[0] else frames[missing]
+                    thumbs = downscale_frames(src, preview_size)
+                    pending.extend((thumb, path, preview_format) for thumb, path in zip(thumbs, missing_paths))
+
+            save_previews(pending)
+
         # 2. 处理视频
         processed_videos = []
         # 修改：使用新的参数名 video_paths_list
@@ -143,7 +184,7 @@ class StoryboardPreviewer:
                     processed_videos.append(None)
                     continue
                     
-                preview_info = self.prepare_video_preview(item)
+                preview_info = self.prepare_video_preview(item, video_proxy_size)
                 if preview_info:
                     processed_videos.append(preview_info)
                 else:
@@ -187,6 +228,8 @@ class StoryboardPreviewer:
             
             if i < len(saved_images):
                 card_data["image"] = saved_images[i]
+                if full_images[i] is not None:
+                    card_data["full_image"] = full_images[i]
             
             if i < len(processed_videos) and processed_videos[i] is not None:
                 card_data["video"] = processed_videos[i]
@@ -1,8 +1,32 @@
 import torch
+import torch.nn.functional as F
+
+def feather_weights(starts, tile_size):
+    """
+    生成一个轴向上每个切片的羽化权重 [N, tile_size]。
+    与相邻切片重叠的区域线性渐变 (1/(ov+1) ... ov/(ov+1))，两侧权重之和恰好为 1；非重叠区域权重为 1。
+    starts: 该轴上各切片的起点 (像素坐标，与 tile_size 处于同一尺度)
+    """
+    count = len(starts)
+    weights = torch.ones((count, tile_size), dtype=torch.float32)
+    for i in range(count):
+        if i > 0:
+            ov = min(tile_size, starts[i - 1] + tile_size - starts[i])
+            if ov > 0:
+                ramp = torch.arange(1, ov + 1, dtype=torch.float32) / (ov + 1)
+                weights[i, :ov] = torch.minimum(weights[i, :ov], ramp)
+        if i < count - 1:
+            ov = min(tile_size, starts[i] + tile_size - starts[i + 1])
+            if ov > 0:
+                ramp = torch.arange(ov, 0, -1, dtype=torch.float32) / (ov + 1)
+                weights[i, tile_size - ov:] = torch.minimum(weights[i, tile_size - ov:], ramp)
+    return weights
+
 
 class Pix_ImageSplitter:
     """
     图像切分节点：将输入的图像按指定的行列平均切分，并输出为图像批次。
+    支持切片重叠 (overlap)，并输出切片布局描述，供 Pix_ImageTileAssembler 拼回原图。
     """
     @classmethod
     def INPUT_TYPES(s):
@@ -12,58 +36,174 @@ class Pix_ImageSplitter:
                 "horizontal": ("INT", {"default": 3, "min": 1, "max": 64, "step": 1}),
                 "vertical": ("INT", {"default": 3, "min": 1, "max": 64, "step": 1}),
             },
+            "optional": {
+                # 尺寸不能整除时的处理方式：Drop 舍弃边缘余数像素；Pad 以边缘像素补齐到整倍数，保留全部像素
+                "remainder": (["Drop", "Pad"], {"default": "Drop"}),
+                # 相邻切片的重叠像素数；大于 0 时切片覆盖整张图像 (remainder 不再生效)
+                "overlap": ("INT", {"default": 0, "min": 0, "max": 4096, "step": 1}),
+            },
         }
 
-    RETURN_TYPES = ("IMAGE",)
-    RETURN_NAMES = ("IMAGE_BATCH",)
+    RETURN_TYPES = ("IMAGE", "PIX_TILE_LAYOUT")
+    RETURN_NAMES = ("IMAGE_BATCH", "tile_layout")
     FUNCTION = "split_image"
     CATEGORY = "PixNodes"
 
-    def split_image(self, image, horizontal, vertical):
+    def split_image(self, image, horizontal, vertical, remainder="Drop", overlap=0):
         # image 形状为 [B, H, W, C]
         # B: 批量大小, H: 高度, W: 宽度, C: 通道数
         batch_size, height, width, channels = image.shape
-        
-        # 计算每个切片的尺寸（整除可能导致边缘极小部分被舍弃，这是常规做法）
-        tile_h = height // vertical
-        tile_w = width // horizontal
-        
-        output_images = []
-
-        # 遍历每一张输入图片（支持输入本身就是批次的情况）
-        for b in range(batch_size):
-            img = image[b] # 提取单张图片 [H, W, C]
-            
-            # 按行（垂直）和列（水平）进行切分
-            for y in range(vertical):
-                for x in range(horizontal):
-                    # 计算切片区域
-                    y_start = y * tile_h
-                    y_end = y_start + tile_h
-                    x_start = x * tile_w
-                    x_end = x_start + tile_w
-                    
-                    # 进行切片操作并保持维度
-                    tile = img[y_start:y_end, x_start:x_end, :]
-                    
-                    # 增加批量维度以符合 IMAGE 格式要求 [1, H, W, C]
-                    output_images.append(tile.unsqueeze(0))
-
-        # 将所有切片在第 0 维（B 维）拼接成新的大批次
-        if len(output_images) > 0:
-            result = torch.cat(output_images, dim=0)
+
+        if overlap > 0:
+            return self.split_overlapping(image, horizontal, vertical, overlap)
+
+        out_h, out_w = height, width
+        if remainder == "Pad":
+            # 向上取整切片尺寸，并用边缘像素 (replicate) 把图像补齐到整倍数
+            tile_h = -(-height // vertical)
+            tile_w = -(-width // horizontal)
+            pad_h = tile_h * vertical - height
+            pad_w = tile_w * horizontal - width
+            if pad_h or pad_w:
+                image = F.pad(image.permute(0, 3, 1, 2), (0, pad_w, 0, pad_h), mode="replicate").permute(0, 2, 3, 1)
         else:
-            # 防御性编程：如果未切分出图片，返回空批次（通常不会发生）
-            result = image
+            # 计算每个切片的尺寸（整除可能导致边缘极小部分被舍弃，这是常规做法）
+            tile_h = height // vertical
+            tile_w = width // horizontal
+            out_h, out_w = tile_h * vertical, tile_w * horizontal
+
+        if tile_h == 0 or tile_w == 0:
+            # 防御性编程：切分数大于图像尺寸时无法切分，原样返回，布局为覆盖整图的 1x1 切片
+            return (image, self.make_layout(height, width, height, width, [0], [0], 0))
+
+        # 向量化切分：一次 view + permute 得到全部切片，无需逐块循环与 torch.cat
+        # [B, V*th, H*tw, C] -> [B, V, th, H, tw, C] -> [B, V, H, th, tw, C]
+        grid = image[:, :tile_h * vertical, :tile_w * horizontal, :]
+        tiles = grid.reshape(batch_size, vertical, tile_h, horizontal, tile_w, channels)
+        tiles = tiles.permute(0, 1, 3, 2, 4, 5)
+
+        # 合并为 [B*V*H, th, tw, C]，顺序为 批次 -> 从上到下 -> 从左到右
+        # reshape 在内存布局允许时 (如只按行切分且无余数) 直接返回视图，否则只做一次连续拷贝
+        result = tiles.reshape(batch_size * vertical * horizontal, tile_h, tile_w, channels)
+
+        ys = [y * tile_h for y in range(vertical)]
+        xs = [x * tile_w for x in range(horizontal)]
+        return (result, self.make_layout(out_h, out_w, tile_h, tile_w, ys, xs, 0))
+
+    def split_overlapping(self, image, horizontal, vertical, overlap):
+        """
+        重叠切分：切片尺寸统一，相邻切片至少重叠 overlap 像素，最后一行/列贴齐图像边缘。
+        通过两次索引 (行、列) 一次性取出全部切片。
+        """
+        batch_size, height, width, channels = image.shape
+
+        def axis_starts(size, count):
+            tile = min(size, -(-(size + (count - 1) * overlap) // count))
+            stride = max(1, tile - overlap)
+            return tile, [min(i * stride, size - tile) for i in range(count)]
+
+        tile_h, ys = axis_starts(height, vertical)
+        tile_w, xs = axis_starts(width, horizontal)
+
+        device = image.device
+        rows = (torch.tensor(ys, device=device)[:, None] + torch.arange(tile_h, device=device)).flatten()
+        cols = (torch.tensor(xs, device=device)[:, None] + torch.arange(tile_w, device=device)).flatten()
+
+        # [B, V*th, W, C] -> [B, V*th, H*tw, C] -> [B, V, th, H, tw, C] -> [B, V, H, th, tw, C]
+        tiles = image.index_select(1, rows).index_select(2, cols)
+        tiles = tiles.reshape(batch_size, vertical, tile_h, horizontal, tile_w, channels).permute(0, 1, 3, 2, 4, 5)
+        result = tiles.reshape(batch_size * vertical * horizontal, tile_h, tile_w, channels)
+
+        return (result, self.make_layout(height, width, tile_h, tile_w, ys, xs, overlap))
+
+    def make_layout(self, height, width, tile_h, tile_w, ys, xs, overlap):
+        """
+        切片布局描述：输出尺寸、切片尺寸以及每行/每列切片的起点坐标。
+        切片在批次中的顺序为 批次 -> 行 -> 列。
+        """
+        return {
+            "height": height,
+            "width": width,
+            "tile_h": tile_h,
+            "tile_w": tile_w,
+            "ys": ys,
+            "xs": xs,
+            "overlap": overlap,
+        }
+
+
+class Pix_ImageTileAssembler:
+    """
+    切片拼合节点：按 Pix_ImageSplitter 输出的布局描述，把 (处理后的) 切片批次拼回完整图像。
+    重叠区域做线性羽化融合；切片若被整体放大/缩小 (如逐块超分)，按比例还原到对应尺寸。
+    """
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "tiles": ("IMAGE",),
+                "tile_layout": ("PIX_TILE_LAYOUT", {"forceInput": True}),
+            },
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    RETURN_NAMES = ("image",)
+    FUNCTION = "assemble"
+    CATEGORY = "PixNodes"
+
+    def assemble(self, tiles, tile_layout):
+        ys, xs = tile_layout["ys"], tile_layout["xs"]
+        rows, cols = len(ys), len(xs)
+        total, tile_h, tile_w, channels = tiles.shape
+        batch_size = total // (rows * cols)
+        if batch_size == 0 or batch_size * rows * cols != total:
+            raise ValueError(f"Pix_ImageTileAssembler: 切片数量 {total} 与布局 {rows}x{cols} 不匹配")
+
+        # 切片相对布局的缩放比例 (处理节点可能改变了切片分辨率)
+        scale_y = tile_h / tile_layout["tile_h"]
+        scale_x = tile_w / tile_layout["tile_w"]
+        ys = [round(y * scale_y) for y in ys]
+        xs = [round(x * scale_x) for x in xs]
+        out_h = round(tile_layout["height"] * scale_y)
+        out_w = round(tile_layout["width"] * scale_x)
+        canvas_h = max(out_h, ys[-1] + tile_h)
+        canvas_w = max(out_w, xs[-1] + tile_w)
+
+        device, dtype = tiles.device, tiles.dtype
+        wy = feather_weights(ys, tile_h).to(device=device, dtype=dtype) # [V, th]
+        wx = feather_weights(xs, tile_w).to(device=device, dtype=dtype) # [H, tw]
+        row_idx = (torch.tensor(ys, device=device)[:, None] + torch.arange(tile_h, device=device)).flatten()
+        col_idx = (torch.tensor(xs, device=device)[:, None] + torch.arange(tile_w, device=device)).flatten()
+
+        # 1. 列方向：每一行的切片乘以列权重后累加为整行条带 [B, V, th, W, C]
+        grid = tiles.reshape(batch_size, rows, cols, tile_h, tile_w, channels)
+        grid = grid * wx.view(1, 1, cols, 1, tile_w, 1)
+        grid = grid.permute(0, 1, 3, 2, 4, 5).reshape(batch_size, rows, tile_h, cols * tile_w, channels)
+        strips = torch.zeros((batch_size, rows, tile_h, canvas_w, channels), device=device, dtype=dtype)
+        strips.index_add_(3, col_idx, grid)
+
+        # 2. 行方向：条带乘以行权重后累加为整图 [B, H, W, C]
+        strips = strips * wy.view(1, rows, tile_h, 1, 1)
+        canvas = torch.zeros((batch_size, canvas_h, canvas_w, channels), device=device, dtype=dtype)
+        canvas.index_add_(1, row_idx, strips.reshape(batch_size, rows * tile_h, canvas_w, channels))
+
+        # 3. 权重可分离，归一化只需行、列两个一维权重和的外积
+        sum_y = torch.zeros(canvas_h, device=device, dtype=dtype).index_add_(0, row_idx, wy.flatten())
+        sum_x = torch.zeros(canvas_w, device=device, dtype=dtype).index_add_(0, col_idx, wx.flatten())
+        norm = (sum_y[:, None] * sum_x[None, :]).clamp_min_(1e-6)
+        canvas.div_(norm.view(1, canvas_h, canvas_w, 1))
+
+        return (canvas[:, :out_h, :out_w, :],)
 
-        return (result,)
 
 # 注册节点类映射，使用 Pix_ 前缀规范 ID
 NODE_CLASS_MAPPINGS = {
-    "Pix_ImageSplitter": Pix_ImageSplitter
+    "Pix_ImageSplitter": Pix_ImageSplitter,
+    "Pix_ImageTileAssembler": Pix_ImageTileAssembler
 }
 
 # 注册显示名称映射，使用英文名称以支持后期国际化
 NODE_DISPLAY_NAME_MAPPINGS = {
-    "Pix_ImageSplitter": "Image Splitter (Pix)"
+    "Pix_ImageSplitter": "Image Splitter (Pix)",
+    "Pix_ImageTileAssembler": "Image Tile Assembler (Pix)"
 }
\ No newline at end of file
@@ -0,0 +1,182 @@
+import torch
+import torch.nn.functional as F
+
+from ._color import rgb_tensor
+
+# ---------------------------------------------------------------------------
+# PixNodes 批量缩放引擎
+# 供 ImageListToBatch / ImageBatchCompose 等节点共用：
+# 1. 按源分辨率分桶，同一分辨率的所有帧只调用一次 F.interpolate
+# 2. 结果直接写入预分配的输出张量，避免逐帧 torch.cat
+# 3. 按字节上限分块缩放，峰值内存约为输出批次本身
+# 文件名以下划线开头，不会被 __init__.py 当作节点模块加载
+# ---------------------------------------------------------------------------
+
+# 单次 interpolate 临时结果的字节上限：同分辨率的帧按此切块缩放，
+# 既保留批量调用的速度，又避免 4K 长批次时临时张量与输出张量双倍占用内存
+RESIZE_CHUNK_BYTES = 256 * 1024 * 1024
+
+# 重采样核：
+# - bilinear: 双线性 (align_corners=False)，历史默认行为
+# - bilinear_antialias / bicubic_antialias: 缩小时按缩放比例扩大卷积核，等效于先模糊再采样，无需额外的预模糊
+# - area: 区域平均，适合整数倍缩小
+# - nearest: 最近邻 (nearest-exact，像素中心对齐)，适合像素画与蒙版
+RESAMPLE_OPTIONS = ["bilinear", "bilinear_antialias", "bicubic_antialias", "area", "nearest"]
+
+
+def calculate_alignment(align_type, diff_w, diff_h):
+    diff_w, diff_h = max(0, diff_w), max(0, diff_h)
+    x_offset, y_offset = diff_w // 2, diff_h // 2
+
+    if "Left" in align_type: x_offset = 0
+    elif "Right" in align_type: x_offset = diff_w
+
+    if "Top" in align_type: y_offset = 0
+    elif "Bottom" in align_type: y_offset = diff_h
+
+    return x_offset, y_offset
+
+
+def plan_placement(mode, alignment, src_h, src_w, target_h, target_w):
+    """
+    计算单个分辨率桶的缩放与摆放参数。
+    返回 (resize_h, resize_w, src_y, src_x, dst_y, dst_x, region_h, region_w)：
+    - resize_h/resize_w: interpolate 的目标尺寸
+    - src_y/src_x: 在缩放结果上的裁切起点 (Fill 模式)
+    - dst_y/dst_x: 写入画布的起点 (Fit 模式)
+    - region_h/region_w: 实际写入的区域大小
+    """
+    if mode == "Fit":
+        scale = min(target_w / src_w, target_h / src_h)
+        new_w, new_h = max(1, round(src_w * scale)), max(1, round(src_h * scale))
+        x_off, y_off = calculate_alignment(alignment, target_w - new_w, target_h - new_h)
+        return new_h, new_w, 0, 0, y_off, x_off, new_h, new_w
+
+    if mode == "Fill":
+        scale = max(target_w / src_w, target_h / src_h)
+        new_w, new_h = max(target_w, round(src_w * scale)), max(target_h, round(src_h * scale))
+        x_off, y_off = calculate_alignment(alignment, new_w - target_w, new_h - target_h)
+        return new_h, new_w, y_off, x_off, 0, 0, target_h, target_w
+
+    # Stretch
+    return target_h, target_w, 0, 0, 0, 0, target_h, target_w
+
+
+def group_by_resolution(images):
+    """
+    按 (H, W, C) 对输入批次分桶，保留每个批次在输出中的起始下标。
+    images: [B, H, W, C] 张量列表 (C 为 3 或 4，RGB 与 RGBA 分属不同的桶)
+    返回 (buckets, total)，buckets 为 {(H, W, C): [(start, tensor), ...]}，按首次出现顺序排列。
+    """
+    buckets = {}
+    total = 0
+    for img in images:
+        key = (img.shape[1], img.shape[2], img.shape[3])
+        buckets.setdefault(key, []).append((total, img))
+        total += img.shape[0]
+    return buckets, total
+
+
+def iter_chunks(members, chunk_frames):
+    """
+    将一个分辨率桶内的帧按最多 chunk_frames 帧切块。
+    每块为 [(out_start, tensor_slice), ...]，切片均为原输入的视图，不产生拷贝。
+    """
+    pending, count = [], 0
+    for start, member in members:
+        pos = 0
+        while pos < member.shape[0]:
+            take = min(chunk_frames - count, member.shape[0] - pos)
+            pending.append((start + pos, member[pos:pos + take]))
+            count += take
+            pos += take
+            if count == chunk_frames:
+                yield pending
+                pending, count = [], 0
+    if pending:
+        yield pending
+
+
+def interpolate_nhwc(src, size, resample="bilinear"):
+    """
+    对 [B, H, W, C] 张量按 resample 指定的核缩放到 size=(H, W)，返回 [B, H, W, C]。
+    permute 后为 channels_last 布局，interpolate 输出同样布局，permute 回来即为连续 NHWC。
+    """
+    x = src.permute(0, 3, 1, 2)
+    if resample == "nearest":
+        x = F.interpolate(x, size=size, mode="nearest-exact")
+    elif resample == "area":
+        x = F.interpolate(x, size=size, mode="area")
+    elif resample == "bicubic_antialias":
+        # 双三次会在边缘产生过冲，截断回 0~1
+        x = F.interpolate(x, size=size, mode="bicubic", align_corners=False, antialias=True).clamp_(0.0, 1.0)
+    else:
+        x = F.interpolate(x, size=size, mode="bilinear", align_corners=False, antialias=(resample == "bilinear_antialias"))
+    return x.permute(0, 2, 3, 1)
+
+
+def resize_batch(images, target_h, target_w, mode, alignment, bg_rgb, device=None, compute_dtype=None, out=None,
+                 resample="bilinear", mask=None):
+    """
+    将多个 [B, H, W, 3/4] 批次缩放/对齐为单个 [N, target_h, target_w, 3] 批次。
+    输出张量一次性分配，Fit 模式的背景色也只填充一次；
+    每个分辨率桶按 RESIZE_CHUNK_BYTES 切块做 interpolate，结果按原顺序写入各自的切片，
+    因此峰值内存约为输出批次 + 一个块的临时缩放结果。
+    device: 计算与输出所在设备，默认跟随第一个输入；各块按需搬运到该设备
+    compute_dtype: 插值计算精度 (如 float16)，结果写回 float32 输出；默认与输入一致
+    out: 可选的预分配输出 (如内存映射文件上的张量)，可与计算设备不同
+    resample: 重采样核，取值见 RESAMPLE_OPTIONS
+    mask: 可选的预分配 MASK 输出 [N, target_h, target_w]，与图像在同一次缩放/摆放中生成：
+          原图内容区域为源 Alpha (RGBA 输入，Alpha 与 RGB 一起插值) 或 1.0 (RGB 输入)，Fit 模式的留白为 0
+    """
+    ref = images[0]
+    device = ref.device if device is None else device
+    out_dtype = ref.dtype if compute_dtype is None else torch.float32
+    compute_dtype = out_dtype if compute_dtype is None else compute_dtype
+    buckets, total = group_by_resolution(images)
+
+    if out is None:
+        out = torch.empty((total, target_h, target_w, 3), dtype=out_dtype, device=device)
+    if mode == "Fit":
+        out.copy_(rgb_tensor(bg_rgb, out.device, out.dtype).view(1, 1, 1, 3).expand_as(out))
+    if mask is not None and mode == "Fit":
+        mask.zero_()
+
+    for (src_h, src_w, channels), members in buckets.items():
+        resize_h, resize_w, src_y, src_x, dst_y, dst_x, region_h, region_w = plan_placement(
+            mode, alignment, src_h, src_w, target_h, target_w
+        )
+        frame_bytes = resize_h * resize_w * channels * torch.finfo(compute_dtype).bits // 8
+        chunk_frames = max(1, RESIZE_CHUNK_BYTES // frame_bytes)
+
+        for pieces in iter_chunks(members, chunk_frames):
+            if len(pieces) == 1:
+                src = pieces[0][1]
+            else:
+                src = torch.cat([piece for _, piece in pieces], dim=0)
+            if channels == 4 and mask is None:
+                # 不需要 MASK 时 Alpha 不参与插值
+                src = src[:, :, :, :3]
+            src = src.to(device=device, dtype=compute_dtype)
+
+            if (resize_h, resize_w) != (src_h, src_w):
+                resized = interpolate_nhwc(src, (resize_h, resize_w), resample)
+            else:
+                resized = src
+
+            region = resized[:, src_y:src_y + region_h, src_x:src_x + region_w, :]
+
+            # 写入切片时顺带完成精度转换 (如 fp16 -> float32)
+            offset = 0
+            for start, piece in pieces:
+                count = piece.shape[0]
+                out[start:start + count, dst_y:dst_y + region_h, dst_x:dst_x + region_w, :] = region[offset:offset + count, :, :, :3]
+                if mask is not None:
+                    mask_region = mask[start:start + count, dst_y:dst_y + region_h, dst_x:dst_x + region_w]
+                    if channels == 4:
+                        mask_region.copy_(region[offset:offset + count, :, :, 3])
+                    else:
+                        mask_region.fill_(1.0)
+                offset += count
+
+    return out
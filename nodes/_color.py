@@ -0,0 +1,273 @@
+import re
+import ast
+import colorsys
+import functools
+
+import torch
+
+# ---------------------------------------------------------------------------
+# PixNodes 共享颜色解析模块
+# ImageListToBatch / ImageBatchCompose / CreateImageBatch 共用同一套解析规则。
+# - parse_color: 解析任意颜色输入，返回 [r, g, b] (0.0-1.0)
+#   字符串 / 整数输入经 LRU 缓存，同一颜色只跑一次 literal_eval、正则与 HSV 转换
+# - rgb_tensor / color_tensor: 按 (颜色, device, dtype) 缓存现成的 [3] 张量，
+#   批量合成时背景色张量只构建一次
+# - rgb_to_hsv_tensor / hsv_to_rgb_tensor: 向量化的 RGB <-> HSV 转换，供 ColorPicker 批量模式使用
+# 返回的张量为共享缓存对象，调用方只读使用，不得原地修改。
+# ---------------------------------------------------------------------------
+
+# 默认白色
+DEFAULT_COLOR = (1.0, 1.0, 1.0)
+
+
+def _parse_color(color_input, default_color):
+    """
+    颜色解析逻辑 - 严格遵循用户定义优先级：
+    1. 列表/元组: 整数->RGB, 浮点->HSV
+    2. 字符串解析:
+       - AST列表: "[255,0,0]" -> 转列表处理
+       - RGB字符串: "rgb(255, 0, 0)" 或 "255, 128, 0" -> RGB (增强兼容性)
+       - 带前缀 Hex: 
+         - 支持 #, 0x, 全角＃, 双井号##
+         - 支持 6位 (RRGGBB) 和 8位 (RRGGBBAA, 丢弃AA)
+         - 支持 3位 (RGB) 和 4位 (RGBA, 丢弃A) 简写
+       - 不带前缀:
+         - 6位 (纯数字或含字母) -> Hex (e.g. "888888"->灰色)
+         - 8位 (含字母) -> Hex (截取前6位)
+         - 8位 (纯数字) -> 十进制整数 (e.g. "16777215"->白色)
+         - 其他长度数字 -> 十进制整数
+    3. 整数直接输入: -> RGB
+    """
+    if color_input is None:
+        return default_color
+
+    # ---------------------------------------------------------
+    # 1. 预处理：AST 解析 (支持用户输入 "[255, 0, 0]" 这种字符串列表)
+    # ---------------------------------------------------------
+    if isinstance(color_input, str):
+        color_input = color_input.strip()
+        if not color_input:
+            return default_color
+            
+        if color_input.startswith('[') and color_input.endswith(']'):
+            try:
+                parsed_list = ast.literal_eval(color_input)
+                if isinstance(parsed_list, (list, tuple)):
+                    color_input = parsed_list
+            except (ValueError, SyntaxError):
+                pass # 解析失败则继续作为普通字符串处理
+
+    # ---------------------------------------------------------
+    # 2. 列表/元组处理 (支持 RGB 和 HSV)
+    # ---------------------------------------------------------
+    if isinstance(color_input, (list, tuple)):
+        if len(color_input) == 0: return default_color
+        
+        # 处理嵌套列表 (Batch 输入可能导致嵌套)
+        if isinstance(color_input[0], (list, tuple)):
+            return _parse_color(color_input[0], default_color)
+            
+        # 确保前三个是数字
+        if len(color_input) >= 3 and all(isinstance(x, (int, float)) for x in color_input[:3]):
+            vals = color_input[:3]
+            
+            # 规则：全整数 -> RGB (0-255)
+            #      含浮点 -> HSV (自动量程)
+            is_all_int = all(isinstance(x, int) for x in vals)
+            
+            if is_all_int:
+                return [v / 255.0 for v in vals]
+            else:
+                # HSV 模式
+                h, s, v = float(vals[0]), float(vals[1]), float(vals[2])
+                # 自动量程识别 (360/100/100 -> 1.0/1.0/1.0)
+                if h > 1.0 or s > 1.0 or v > 1.0:
+                    h, s, v = h / 360.0, s / 100.0, v / 100.0
+                
+                rgb = list(colorsys.hsv_to_rgb(h, s, v))
+                return [max(0.0, min(1.0, c)) for c in rgb]
+        
+        # 单个值的列表 (e.g. ["#FFFFFF"])
+        if len(color_input) == 1:
+            return _parse_color(color_input[0], default_color)
+
+    # ---------------------------------------------------------
+    # 3. 字符串核心解析逻辑
+    # ---------------------------------------------------------
+    if isinstance(color_input, str):
+        # 3.1 RGB 逗号分隔 (增强版)
+        # 只要包含逗号，就尝试作为数组解析
+        if ',' in color_input:
+            try:
+                # 移除所有非数字、非逗号、非小数点的字符
+                # 这将支持 "rgb(255, 0, 0)", "(255, 0, 0)", "Color: 255, 0, 0"
+                clean_rgb_str = re.sub(r'[^\d,.]', '', color_input)
+                parts = clean_rgb_str.split(',')
+                # 过滤空字符串
+                parts = [p for p in parts if p]
+                
+                if len(parts) >= 3:
+                    vals = [float(p.strip()) for p in parts[:3]]
+                    return [max(0.0, min(1.0, v / 255.0)) for v in vals]
+            except ValueError:
+                pass
+
+        # 3.2 清理空格，统一处理 Hex 和 Int
+        # 用户要求：
+        # 1. 中间有空格自动忽略 (e.g. "# FF 00 00")
+        # 2. 全角井号转半角
+        clean_str = color_input.replace(" ", "").lower().replace("＃", "#")
+
+        # 3.3 带前缀的 Hex (#, ##, 0x)
+        # 正则匹配：以 # (一个或多个) 或 0x 开头
+        prefix_match = re.match(r'^(?:#+|0x)(.*)$', clean_str)
+        if prefix_match:
+            hex_body = prefix_match.group(1)
+            
+            # 处理 8 位 Hex (RRGGBBAA) -> 截取前 6 位，丢弃 Alpha
+            if len(hex_body) == 8:
+                hex_body = hex_body[:6]
+
+            # 处理 3/4 位简写 Hex (RGB / RGBA) -> 展开为 6 位，丢弃 Alpha
+            if len(hex_body) in (3, 4):
+                hex_body = "".join(c * 2 for c in hex_body[:3])
+            
+            # 仅支持 6 位 Hex
+            if len(hex_body) == 6:
+                try:
+                    r = int(hex_body[0:2], 16) / 255.0
+                    g = int(hex_body[2:4], 16) / 255.0
+                    b = int(hex_body[4:6], 16) / 255.0
+                    return [r, g, b]
+                except ValueError: pass
+
+        # 3.4 不带前缀的情况
+        else:
+            is_hex = False
+            temp_hex_str = clean_str
+            
+            # 规则 A: 6 位字符 (无论纯数字还是含字母) -> 优先视为 Hex
+            if len(temp_hex_str) == 6 and bool(re.fullmatch(r'[0-9a-f]{6}', temp_hex_str)):
+                is_hex = True
+            
+            # 规则 B: 8 位字符
+            # 如果包含字母 -> 视为 Hex (RRGGBBAA)，截取前6位
+            # 如果是全数字 (e.g. "16777215") -> 视为 十进制 (保留给下面的 isdigit 处理)
+            elif len(temp_hex_str) == 8 and bool(re.search(r'[a-f]', temp_hex_str)) and bool(re.fullmatch(r'[0-9a-f]{8}', temp_hex_str)):
+                 temp_hex_str = temp_hex_str[:6] # 截取
+                 is_hex = True
+
+            if is_hex:
+                try:
+                    r = int(temp_hex_str[0:2], 16) / 255.0
+                    g = int(temp_hex_str[2:4], 16) / 255.0
+                    b = int(temp_hex_str[4:6], 16) / 255.0
+                    return [r, g, b]
+                except ValueError: pass
+            
+            # 规则 C: 其他长度的全数字 (e.g. "16711680") -> 识别为十进制整数
+            # 注意：8位全数字也会掉落到这里，被正确识别为十进制
+            if clean_str.isdigit():
+                try:
+                    val = int(clean_str)
+                    # 十进制整数转 RGB (位运算)
+                    r = (val >> 16) & 0xFF
+                    g = (val >> 8) & 0xFF
+                    b = val & 0xFF
+                    return [r / 255.0, g / 255.0, b / 255.0]
+                except ValueError: pass
+
+    # ---------------------------------------------------------
+    # 4. 整数直接输入 (e.g. 从其他节点传入的 INT)
+    # ---------------------------------------------------------
+    if isinstance(color_input, int):
+        r = (color_input >> 16) & 0xFF
+        g = (color_input >> 8) & 0xFF
+        b = color_input & 0xFF
+        return [r / 255.0, g / 255.0, b / 255.0]
+        
+    # ---------------------------------------------------------
+    # 5. Tensor 输入处理
+    # ---------------------------------------------------------
+    if isinstance(color_input, torch.Tensor):
+        return _parse_color(color_input.flatten().tolist(), default_color)
+
+    return default_color
+
+
+
+@functools.lru_cache(maxsize=256, typed=True)
+def _parse_color_cached(color_input, default_color):
+    return tuple(_parse_color(color_input, list(default_color)))
+
+
+def parse_color(color_input, default_color=DEFAULT_COLOR):
+    """
+    解析颜色输入，返回 [r, g, b] (0.0-1.0)，无法解析时返回 default_color。
+    字符串与整数 (最常见的控件输入) 走 LRU 缓存；列表、Tensor 等输入本身已是数值，直接解析。
+    """
+    default_color = tuple(default_color)
+    if isinstance(color_input, (str, int)):
+        return list(_parse_color_cached(color_input, default_color))
+    return list(_parse_color(color_input, list(default_color)))
+
+
+@functools.lru_cache(maxsize=64)
+def _rgb_tensor_cached(rgb, device, dtype):
+    return torch.tensor(rgb, dtype=dtype, device=device)
+
+
+def rgb_tensor(rgb, device="cpu", dtype=torch.float32):
+    """
+    [r, g, b] (0.0-1.0) -> 形状为 [3] 的张量，按 (颜色, device, dtype) 缓存。
+    """
+    return _rgb_tensor_cached(tuple(float(c) for c in rgb), torch.device(device), dtype)
+
+
+def color_tensor(color_input, device="cpu", dtype=torch.float32, default_color=DEFAULT_COLOR):
+    """
+    解析任意颜色输入并直接返回缓存的 [3] 张量。
+    """
+    return rgb_tensor(parse_color(color_input, default_color), device, dtype)
+
+
+def rgb_to_hsv_tensor(rgb):
+    """
+    向量化的 RGB -> HSV：rgb 为 [..., 3] 张量 (0.0-1.0)，返回同形状的 HSV (均为 0.0-1.0)。
+    与 colorsys.rgb_to_hsv 逐元素等价 (灰色的色相为 0)。
+    """
+    r, g, b = rgb.unbind(-1)
+    maxc = rgb.amax(dim=-1)
+    minc = rgb.amin(dim=-1)
+    delta = maxc - minc
+    safe_delta = torch.where(delta > 0, delta, torch.ones_like(delta))
+    rc, gc, bc = (maxc - r) / safe_delta, (maxc - g) / safe_delta, (maxc - b) / safe_delta
+    h = torch.where(r == maxc, bc - gc, torch.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = torch.where(delta > 0, torch.remainder(h / 6.0, 1.0), torch.zeros_like(h))
+    s = torch.where(maxc > 0, delta / torch.where(maxc > 0, maxc, torch.ones_like(maxc)), torch.zeros_like(maxc))
+    return torch.stack((h, s, maxc), dim=-1)
+
+
+def hsv_to_rgb_tensor(hsv):
+    """
+    向量化的 HSV -> RGB：hsv 为 [..., 3] 张量 (0.0-1.0)，返回同形状的 RGB (0.0-1.0)。
+    与 colorsys.hsv_to_rgb 逐元素等价。
+    """
+    h, s, v = hsv.unbind(-1)
+    h6 = h * 6.0
+    sector = h6.floor()
+    f = h6 - sector
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    # 6 个扇区对应的 (r, g, b) 取值，按扇区下标一次 gather
+    table = torch.stack((
+        torch.stack((v, t, p), dim=-1),
+        torch.stack((q, v, p), dim=-1),
+        torch.stack((p, v, t), dim=-1),
+        torch.stack((p, q, v), dim=-1),
+        torch.stack((t, p, v), dim=-1),
+        torch.stack((v, p, q), dim=-1),
+    ), dim=-2)
+    index = torch.remainder(sector.long(), 6).view(*sector.shape, 1, 1).expand(*sector.shape, 1, 3)
+    return table.gather(-2, index).squeeze(-2)
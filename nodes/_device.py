@@ -0,0 +1,66 @@
+import torch
+
+# ---------------------------------------------------------------------------
+# PixNodes 执行设备选择
+# - auto: 跟随输入张量所在设备，不做任何跨设备搬运
+# - cpu:  在 CPU 上计算
+# - gpu:  在当前加速器上计算 (优先使用 ComfyUI 的 model_management，其次 CUDA / MPS)，
+#         不可用时回退到 CPU
+# ---------------------------------------------------------------------------
+
+DEVICE_OPTIONS = ["auto", "cpu", "gpu"]
+PRECISION_OPTIONS = ["fp32", "fp16"]
+
+
+def accelerator_device():
+    """
+    返回当前加速器设备，没有可用加速器时返回 CPU。
+    """
+    try:
+        import comfy.model_management as model_management
+        return torch.device(model_management.get_torch_device())
+    except Exception:
+        pass
+
+    if torch.cuda.is_available():
+        return torch.device("cuda")
+    mps = getattr(torch.backends, "mps", None)
+    if mps is not None and mps.is_available():
+        return torch.device("mps")
+    return torch.device("cpu")
+
+
+def resolve_device(choice, ref_tensor):
+    if choice == "cpu":
+        return torch.device("cpu")
+    if choice == "gpu":
+        device = accelerator_device()
+        if device.type == "cpu":
+            print("[PixNodes] Warning: 未检测到可用的加速器，回退到 CPU 执行。")
+        return device
+    return ref_tensor.device
+
+
+def resolve_dtype(precision, device):
+    """
+    计算精度：fp16 仅用于中间计算，结果仍写回 float32；fp32 返回 None，表示跟随输入精度。
+    CPU 上的半精度插值没有专用内核，实测比 float32 更慢，因此 CPU 始终使用全精度。
+    """
+    if precision == "fp16" and device.type != "cpu":
+        return torch.float16
+    return None
+
+
+def run_with_cpu_fallback(fn, device, label="PixNodes"):
+    """
+    在指定设备上执行 fn(device)；非 CPU 设备执行失败 (如显存不足、算子不支持) 时回退到 CPU 重试。
+    """
+    if device.type == "cpu":
+        return fn(device)
+    try:
+        return fn(device)
+    except RuntimeError as e:
+        print(f"[{label}] Warning: 在 {device} 上执行失败 ({e})，回退到 CPU。")
+        if device.type == "cuda":
+            torch.cuda.empty_cache()
+        return fn(torch.device("cpu"))
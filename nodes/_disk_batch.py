@@ -0,0 +1,162 @@
+import os
+import struct
+
+import numpy as np
+import torch
+
+# ---------------------------------------------------------------------------
+# PixNodes 磁盘批次 (Disk Batch)
+# 将 IMAGE 批次保存为「64 字节文件头 + 原始像素」的单个文件，读取时通过内存映射按需换页，
+# 超长视频帧序列无需整体驻留内存。
+#
+# 文件头 (小端)：
+#   magic   4s  b"PIXB"
+#   version H   格式版本，当前为 1
+#   dtype   H   0 = uint8 (0~255)，1 = float16 (0~1)
+#   frames  I   帧数 N
+#   height  I   H
+#   width   I   W
+#   channels I  C
+# 之后补零至 HEADER_SIZE，像素按 [N, H, W, C] 行优先连续存放。
+# ---------------------------------------------------------------------------
+
+MAGIC = b"PIXB"
+VERSION = 1
+HEADER_SIZE = 64
+HEADER_STRUCT = struct.Struct("<4sHHIIII")
+
+DTYPE_CODES = {"uint8": 0, "float16": 1}
+NUMPY_DTYPES = {0: np.uint8, 1: np.float16}
+
+# 写入时每次转换的帧数，避免对整批次做一次性 uint8/float16 拷贝
+WRITE_CHUNK_FRAMES = 32
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError(f"不是有效的 PixNodes 磁盘批次文件: {path}")
+    magic, version, dtype_code, frames, height, width, channels = HEADER_STRUCT.unpack_from(raw)
+    if magic != MAGIC or dtype_code not in NUMPY_DTYPES:
+        raise ValueError(f"不是有效的 PixNodes 磁盘批次文件: {path}")
+    if version > VERSION:
+        raise ValueError(f"磁盘批次文件版本过新 ({version})，请更新 PixNodes: {path}")
+    return dtype_code, frames, height, width, channels
+
+
+def pack_header(dtype_code, frames, height, width, channels):
+    header = HEADER_STRUCT.pack(MAGIC, VERSION, dtype_code, frames, height, width, channels)
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+def encode_frames(images, dtype_code):
+    """
+    将 [B, H, W, C] 浮点张量转换为待写入的 numpy 数组 (CPU)。
+    """
+    images = images.detach()
+    if dtype_code == 0:
+        pixels = images.clamp(0.0, 1.0).mul(255.0).round_().to(device="cpu", dtype=torch.uint8)
+    else:
+        pixels = images.to(device="cpu", dtype=torch.float16)
+    return pixels.contiguous().numpy()
+
+
+def write_disk_batch(path, images, dtype="uint8", append=False):
+    """
+    将 IMAGE 批次写入磁盘批次文件，返回写入后的 DiskBatch。
+    append=True 且文件已存在时追加到末尾，要求分辨率、通道数和存储精度一致。
+    """
+    if images.ndim == 3:
+        images = images.unsqueeze(0)
+    frames, height, width, channels = images.shape
+    dtype_code = DTYPE_CODES[dtype]
+
+    if append and os.path.isfile(path):
+        old_code, old_frames, old_h, old_w, old_c = read_header(path)
+        if (old_code, old_h, old_w, old_c) != (dtype_code, height, width, channels):
+            raise ValueError(
+                f"追加失败：已有文件为 {old_w}x{old_h}x{old_c} ({'uint8' if old_code == 0 else 'float16'})，"
+                f"新批次为 {width}x{height}x{channels} ({dtype})"
+            )
+        mode, start_frames = "r+b", old_frames
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        mode, start_frames = "wb", 0
+
+    with open(path, mode) as f:
+        if mode == "wb":
+            f.write(pack_header(dtype_code, 0, height, width, channels))
+        frame_bytes = height * width * channels * np.dtype(NUMPY_DTYPES[dtype_code]).itemsize
+        f.seek(HEADER_SIZE + start_frames * frame_bytes)
+        for start in range(0, frames, WRITE_CHUNK_FRAMES):
+            f.write(encode_frames(images[start:start + WRITE_CHUNK_FRAMES], dtype_code).tobytes())
+        f.truncate()
+        # 像素写完后再更新帧数，中途失败时文件头仍指向旧的有效数据
+        f.seek(0)
+        f.write(pack_header(dtype_code, start_frames + frames, height, width, channels))
+
+    return DiskBatch(path)
+
+
+class DiskBatch:
+    """
+    磁盘批次的惰性视图：只保存路径与形状，按下标/切片访问时才映射并转换对应的帧。
+    索引结果为标准 IMAGE 张量 [n, H, W, C] (float32, 0~1)。
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.dtype_code, self.frames, self.height, self.width, self.channels = read_header(self.path)
+        self._array = None
+
+    @property
+    def shape(self):
+        return (self.frames, self.height, self.width, self.channels)
+
+    @property
+    def dtype(self):
+        return "uint8" if self.dtype_code == 0 else "float16"
+
+    def __len__(self):
+        return self.frames
+
+    def __repr__(self):
+        return f"DiskBatch({self.path!r}, shape={self.shape}, dtype={self.dtype})"
+
+    # 映射对象不参与序列化，跨进程传递时重新打开
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_array"] = None
+        return state
+
+    @property
+    def array(self):
+        if self._array is None:
+            if self.frames == 0:
+                self._array = np.empty(self.shape, dtype=NUMPY_DTYPES[self.dtype_code])
+            else:
+                # copy-on-write 映射：可直接交给 torch.from_numpy，且任何修改都不会写回文件
+                self._array = np.memmap(self.path, dtype=NUMPY_DTYPES[self.dtype_code], mode="c",
+                                        offset=HEADER_SIZE, shape=self.shape)
+        return self._array
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            if index < 0:
+                index += self.frames
+            if not 0 <= index < self.frames:
+                raise IndexError(f"帧下标越界: {index} (共 {self.frames} 帧)")
+            index = slice(index, index + 1)
+        pixels = torch.from_numpy(np.ascontiguousarray(self.array[index]))
+        if self.dtype_code == 0:
+            return pixels.to(torch.float32).div_(255.0)
+        return pixels.to(torch.float32)
+
+    def iter_batches(self, chunk_frames):
+        """
+        按最多 chunk_frames 帧依次产出 IMAGE 张量，峰值内存只与块大小有关。
+        """
+        chunk_frames = max(1, int(chunk_frames))
+        for start in range(0, self.frames, chunk_frames):
+            yield self[start:start + chunk_frames]
@@ -0,0 +1,167 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# PixNodes 解码图像缓存
+# 两级 LRU 缓存：内存 (OrderedDict) + 磁盘 (.npy 文件)，均按字节预算淘汰。
+# 缓存内容为 uint8 像素数组 [H, W, 3]，占用仅为 float32 的 1/4。
+# 键由调用方提供 (通常包含 路径、mtime、文件大小、缩放参数 等)，
+# 文件内容变化后 mtime/size 随之变化，旧条目自然失效并最终被淘汰。
+# 线程安全，可在 CreateImageBatch 的解码线程池中并发访问。
+# 预算为进程内共享，只增不减 (见 raise_budget)；budget 为 0 的实例不缓存任何内容。
+# ---------------------------------------------------------------------------
+
+
+class ImageCache:
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.budget = 0
+        self.lock = threading.Lock()
+
+        self.memory = OrderedDict() # key_hash -> np.ndarray
+        self.memory_bytes = 0
+
+        self.disk_index = None # key_hash -> 文件字节数，按最近使用排序 (首次访问时扫描目录)
+        self.disk_bytes = 0
+
+    @staticmethod
+    def make_key(*parts):
+        return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+    def raise_budget(self, budget_bytes):
+        """
+        将预算提高到 budget_bytes (不会降低)。
+        同一进程中的多个节点共用一个缓存，取较小值会淘汰其他节点刚缓存的条目。
+        """
+        with self.lock:
+            budget = int(budget_bytes)
+            if budget <= self.budget:
+                return
+            self.budget = budget
+            if self.cache_dir:
+                self._load_disk_index()
+                self._evict_disk()
+
+    # ---------------- 内存层 ----------------
+
+    def _evict_memory(self):
+        while self.memory and self.memory_bytes > self.budget:
+            _, arr = self.memory.popitem(last=False)
+            self.memory_bytes -= arr.nbytes
+
+    def _put_memory(self, key, arr):
+        if arr.nbytes > self.budget:
+            return
+        old = self.memory.pop(key, None)
+        if old is not None:
+            self.memory_bytes -= old.nbytes
+        self.memory[key] = arr
+        self.memory_bytes += arr.nbytes
+        self._evict_memory()
+
+    # ---------------- 磁盘层 ----------------
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _load_disk_index(self):
+        if self.disk_index is not None:
+            return
+        self.disk_index = OrderedDict()
+        self.disk_bytes = 0
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entries = [e for e in os.scandir(self.cache_dir) if e.is_file() and e.name.endswith(".npy")]
+        except OSError as e:
+            print(f"[PixNodes] ImageCache: 无法访问缓存目录 {self.cache_dir}: {e}")
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for e in entries:
+            size = e.stat().st_size
+            self.disk_index[e.name[:-4]] = size
+            self.disk_bytes += size
+
+    def _evict_disk(self):
+        while self.disk_index and self.disk_bytes > self.budget:
+            key, size = self.disk_index.popitem(last=False)
+            self.disk_bytes -= size
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    # ---------------- 公共接口 ----------------
+
+    def get(self, key):
+        """
+        命中返回 uint8 数组 (只读，调用方不得原地修改)，未命中返回 None。
+        """
+        if self.budget <= 0:
+            return None
+
+        with self.lock:
+            arr = self.memory.get(key)
+            if arr is not None:
+                self.memory.move_to_end(key)
+                return arr
+            if not self.cache_dir:
+                return None
+            self._load_disk_index()
+            if key not in self.disk_index:
+                return None
+            self.disk_index.move_to_end(key)
+
+        # 磁盘读取放在锁外，避免阻塞其他线程
+        path = self._disk_path(key)
+        try:
+            arr = np.load(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self.lock:
+                size = self.disk_index.pop(key, None)
+                if size is not None:
+                    self.disk_bytes -= size
+            return None
+
+        with self.lock:
+            self._put_memory(key, arr)
+        return arr
+
+    def put(self, key, arr):
+        if self.budget <= 0 or arr.nbytes > self.budget:
+            return
+
+        arr = np.ascontiguousarray(arr, dtype=np.uint8)
+        with self.lock:
+            self._put_memory(key, arr)
+            if not self.cache_dir:
+                return
+            self._load_disk_index()
+            if key in self.disk_index:
+                return
+
+        # 先写临时文件再原子替换，防止并发读到不完整的数据
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, arr)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[PixNodes] ImageCache: 写入缓存失败 {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        size = os.path.getsize(path)
+        with self.lock:
+            if key not in self.disk_index:
+                self.disk_index[key] = size
+                self.disk_bytes += size
+                self._evict_disk()
@@ -0,0 +1,95 @@
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+from PIL import Image
+
+from ._batch_resize import interpolate_nhwc
+
+# ---------------------------------------------------------------------------
+# PixNodes 预览图写出工具
+# 供 StoryboardPreviewer / ImageComparer 等输出节点共用：
+# 1. 帧指纹：直接对浮点像素缓冲区做哈希，用于内容寻址的文件名与「输入未变化」判断
+# 2. 缩略图：同尺寸的帧一次性缩小
+# 3. 编码：线程池并行编码 PNG / WebP / JPEG，先写临时文件再原子替换
+# ---------------------------------------------------------------------------
+
+# 可选：xxhash (xxh3_64) 用于计算帧指纹；未安装时使用 zlib.crc32，两者都比 md5 快数倍
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# 预览格式：名称 -> (扩展名, PIL 格式, 保存参数)
+PREVIEW_FORMATS = {
+    "png": ("png", "PNG", {"compress_level": 4}),
+    # 无损但几乎不压缩，编码速度约为默认 PNG 的数倍，文件更大
+    "png_fast": ("png", "PNG", {"compress_level": 1}),
+    "webp": ("webp", "WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("jpg", "JPEG", {"quality": 85}),
+}
+
+
+def frame_fingerprint(frame):
+    """
+    计算 CPU 上连续的 float32 Tensor (单帧 [H, W, 3] 或整批) 的指纹。
+    直接对浮点像素缓冲区做哈希，省去 uint8 转换和 PIL 拷贝；形状也参与哈希。
+    """
+    data = frame.numpy()
+    shape = repr(tuple(frame.shape)).encode("utf-8")
+    if XXHASH_AVAILABLE:
+        hasher = xxhash.xxh3_64(shape)
+        hasher.update(data)
+        return hasher.hexdigest()
+    return f"{zlib.crc32(data, zlib.crc32(shape)):08x}"
+
+
+def to_cpu_frames(images):
+    """
+    IMAGE -> CPU 上连续的 float32 [N, H, W, C]，已满足条件时不拷贝。
+    """
+    return images.detach().to(device="cpu", dtype=torch.float32).contiguous()
+
+
+def downscale_frames(frames, max_size):
+    """
+    将同尺寸的帧 [N, H, W, 3] 一次性缩小到最长边不超过 max_size (抗锯齿双线性)，不放大。
+    """
+    h, w = frames.shape[1], frames.shape[2]
+    if max_size <= 0 or max(h, w) <= max_size:
+        return frames
+    scale = max_size / max(h, w)
+    size = (max(1, round(h * scale)), max(1, round(w * scale)))
+    return interpolate_nhwc(frames, size, "bilinear_antialias").contiguous()
+
+
+def save_preview(frame, full_path, preview_format="png"):
+    """
+    将单帧转换为 uint8 并按 preview_format 编码写入，在线程池中调用。
+    先写临时文件再原子替换，避免并发执行时前端读到不完整的图片。
+    """
+    _, pil_format, params = PREVIEW_FORMATS[preview_format]
+    if pil_format == "JPEG" and frame.shape[-1] == 4:
+        # JPEG 不支持 Alpha 通道
+        frame = frame[..., :3]
+    frame_np = frame.mul(255.0).clamp_(0, 255).to(torch.uint8).numpy()
+    tmp_path = f"{full_path}.{threading.get_ident()}.tmp"
+    Image.fromarray(frame_np).save(tmp_path, format=pil_format, **params)
+    os.replace(tmp_path, full_path)
+
+
+def save_previews(jobs):
+    """
+    并行执行 [(frame, full_path, preview_format), ...]。
+    PIL 编码 (zlib / libwebp / libjpeg) 时会释放 GIL，线程数为 CPU 核心数 (最多 32)。
+    """
+    if len(jobs) == 1:
+        save_preview(*jobs[0])
+    elif jobs:
+        workers = min(len(jobs), 32, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # list() 使工作线程中的异常在这里抛出
+            list(executor.map(lambda job: save_preview(*job), jobs))
@@ -0,0 +1,199 @@
+import os
+import re
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import folder_paths
+
+# ---------------------------------------------------------------------------
+# PixNodes 视频预览链接管理
+# GetVideoFromPathList / StoryboardPreviewer 需要把源视频放进 temp 目录供前端 /view 访问：
+# 1. 优先创建符号链接，其次硬链接，均不占用额外磁盘空间，也不阻塞执行
+# 2. 两者都失败 (如 Windows 无符号链接权限且跨盘) 时，在后台线程中复制，执行线程立即返回
+# 3. 已有预览记录在索引中 (首次使用时扫描 temp 目录)，源文件 mtime/size 不变时直接复用
+# 4. 复制出来的预览按最近使用 (LRU) 淘汰，总大小不超过 PREVIEW_QUOTA_BYTES；链接不计入配额
+# 线程安全。
+# ---------------------------------------------------------------------------
+
+# 复制预览的磁盘配额
+PREVIEW_QUOTA_BYTES = 4 * 1024 * 1024 * 1024
+
+# 索引中的条目数上限 (链接不占空间，但也不无限累积)
+MAX_PREVIEW_ENTRIES = 4096
+
+# 由本模块管理的预览文件名前缀。不能与其他节点写入 temp 的文件重名
+# (如 StoryboardPreviewer 的图像预览 sb_preview_{序号}_{指纹})，否则扫描时会被误当作视频预览淘汰
+PREVIEW_PREFIXES = ("pix_preview", "sb_video", "sb_proxy")
+
+# 扫描 temp 目录时只收录 preview_name 格式的文件
+PREVIEW_NAME_RE = re.compile(r"^(?:%s)_[0-9a-f]{8}_." % "|".join(map(re.escape, PREVIEW_PREFIXES)))
+
+
+def preview_name(prefix, src_path):
+    """
+    预览文件名：前缀 + 源路径哈希 + 原文件名。prefix 须为 PREVIEW_PREFIXES 之一。
+    """
+    path_hash = hashlib.md5(src_path.encode("utf-8")).hexdigest()[:8]
+    return f"{prefix}_{path_hash}_{os.path.basename(src_path)}"
+
+
+class PreviewLinkManager:
+    def __init__(self, quota_bytes=PREVIEW_QUOTA_BYTES, max_entries=MAX_PREVIEW_ENTRIES):
+        self.quota_bytes = quota_bytes
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="PixPreviewCopy")
+
+        # 文件名 -> {"src", "mtime_ns", "size", "bytes"}，按最近使用排序；bytes 为占用的磁盘空间 (链接为 0)
+        self.index = None
+        self.copied_bytes = 0
+        self.pending = {} # 文件名 -> 正在进行的后台复制
+
+    @property
+    def temp_dir(self):
+        return folder_paths.get_temp_directory()
+
+    def _load_index(self):
+        """
+        首次使用时扫描 temp 目录中已有的预览 (如节点模块重新加载后)，按修改时间排序。
+        """
+        if self.index is not None:
+            return
+        self.index = OrderedDict()
+        self.copied_bytes = 0
+        try:
+            entries = [e for e in os.scandir(self.temp_dir) if PREVIEW_NAME_RE.match(e.name)]
+        except OSError:
+            return
+        found = []
+        for e in entries:
+            try:
+                st = e.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            # 符号链接和硬链接不占用额外空间；源文件信息未知，首次访问时重新校验
+            cost = 0 if e.is_symlink() or st.st_nlink > 1 else st.st_size
+            found.append((st.st_mtime, e.name, cost))
+        for _, name, cost in sorted(found):
+            self.index[name] = {"src": None, "mtime_ns": None, "size": None, "bytes": cost}
+            self.copied_bytes += cost
+
+    def _remove(self, name):
+        record = self.index.pop(name, None)
+        if record is not None:
+            self.copied_bytes -= record["bytes"]
+        try:
+            os.remove(os.path.join(self.temp_dir, name))
+        except OSError:
+            pass
+
+    def _evict(self, keep):
+        victims = []
+        for name, record in self.index.items():
+            over_quota = self.copied_bytes > self.quota_bytes
+            over_count = len(self.index) - len(victims) > self.max_entries
+            if not over_quota and not over_count:
+                break
+            if name == keep or name in self.pending:
+                continue
+            # 只超出字节配额时，淘汰不占空间的链接没有意义
+            if not over_count and record["bytes"] == 0:
+                continue
+            victims.append(name)
+            # 先扣除占用，循环条件按淘汰后的状态判断
+            self.copied_bytes -= record["bytes"]
+            record["bytes"] = 0
+        for name in victims:
+            self._remove(name)
+
+    def _copy(self, src_path, name, record):
+        dst = os.path.join(self.temp_dir, name)
+        tmp_path = f"{dst}.{threading.get_ident()}.tmp"
+        try:
+            shutil.copy2(src_path, tmp_path)
+            os.replace(tmp_path, dst)
+        except OSError as e:
+            print(f"[PixNodes] PreviewLinkManager: 复制预览失败 {src_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            with self.lock:
+                self.pending.pop(name, None)
+                self.index.pop(name, None)
+            return
+        with self.lock:
+            self.pending.pop(name, None)
+            if name in self.index:
+                record["bytes"] = record["size"]
+                self.copied_bytes += record["bytes"]
+                self._evict(keep=name)
+
+    def get(self, src_path, prefix):
+        """
+        返回前端可用的预览信息 {"filename", "subfolder", "type", "pending"}，源文件不存在时返回 None。
+        pending=True 表示正在后台复制，文件稍后才可访问。
+        """
+        src_path = os.path.abspath(src_path)
+        try:
+            st = os.stat(src_path)
+        except OSError:
+            return None
+        name = preview_name(prefix, src_path)
+        dst = os.path.join(self.temp_dir, name)
+        info = {"filename": name, "subfolder": "", "type": "temp", "pending": False}
+
+        with self.lock:
+            self._load_index()
+            record = self.index.get(name)
+            if record is not None:
+                if name in self.pending:
+                    self.index.move_to_end(name)
+                    info["pending"] = True
+                    return info
+                # 源文件未变化且预览仍可访问 (符号链接目标存在) 时直接复用；
+                # 扫描得到的旧预览没有源文件信息，按旧版行为视为有效并补全记录
+                unchanged = record["src"] is None or (record["mtime_ns"], record["size"]) == (st.st_mtime_ns, st.st_size)
+                if unchanged and os.path.exists(dst):
+                    record.update({"src": src_path, "mtime_ns": st.st_mtime_ns, "size": st.st_size})
+                    self.index.move_to_end(name)
+                    return info
+                self._remove(name)
+            elif os.path.lexists(dst):
+                # 不在索引中的同名文件 (如外部残留)，重新创建
+                try:
+                    os.remove(dst)
+                except OSError:
+                    pass
+
+            record = {"src": src_path, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "bytes": 0}
+            self.index[name] = record
+
+        # 1. 符号链接 2. 硬链接：都是元数据操作，立即完成
+        os.makedirs(self.temp_dir, exist_ok=True)
+        for make_link in (os.symlink, getattr(os, "link", None)):
+            if make_link is None:
+                continue
+            try:
+                make_link(src_path, dst)
+                with self.lock:
+                    self._evict(keep=name)
+                return info
+            except FileExistsError:
+                return info # 并发调用已创建
+            except OSError:
+                continue
+
+        # 3. 后台复制，不阻塞执行线程
+        with self.lock:
+            if name not in self.pending:
+                self.pending[name] = self.executor.submit(self._copy, src_path, name, record)
+        info["pending"] = True
+        return info
+
+
+# 全局共享 (跨节点实例与多次执行)
+PREVIEW_LINKS = PreviewLinkManager()
@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import functools
+import threading
+
+import folder_paths
+
+# 仅读取容器元数据 (Metadata)，不解码画面
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+# ---------------------------------------------------------------------------
+# PixNodes 视频元数据索引
+# 按 (绝对路径, mtime, 文件大小) 缓存 fps / 帧数 / 时长 / 分辨率 / 编码，
+# 内存中为字典，磁盘上为 user/PixNodes/video_meta.jsonl (每行一条记录，只追加，后写的覆盖先写的)。
+# 同一文件在内容不变时只打开一次容器，跨执行、跨重启复用；文件被修改后 mtime/size 变化，自动重新探测。
+# 线程安全，可在线程池中并发探测。
+# 另含 GetVideoFromPathList / GetVideoMetadata 共用的路径列表解析。
+# ---------------------------------------------------------------------------
+
+# 无法读取帧率时的默认值 (与前端时间码默认值一致)
+DEFAULT_FPS = 30.0
+
+# 文件中过期/重复的记录超过有效记录数的这个倍数时，加载后重写压缩
+COMPACT_RATIO = 2
+
+
+@functools.lru_cache(maxsize=16)
+def parse_path_list(video_paths_json):
+    """
+    解析路径列表文本，返回清理后的路径元组。
+    按文本缓存：按 index 遍历同一列表时只解析一次。
+    """
+    paths = []
+    text = video_paths_json.strip()
+
+    # A. 尝试 JSON 解析 (最严格)
+    try:
+        if text.startswith("[") and text.endswith("]"):
+            loaded = json.loads(text)
+            if isinstance(loaded, list):
+                paths = [str(item) for item in loaded]
+    except json.JSONDecodeError:
+        pass
+
+    # B. 如果不是 JSON，使用正则处理多种分隔符
+    if not paths:
+        # 使用正则按 [逗号 或 换行符] 进行分割，过滤掉空项
+        # r'[,\n\r]+' 意味着匹配一个或多个连续的逗号、换行或回车
+        paths = [x for x in re.split(r'[,\n\r]+', text) if x.strip()]
+
+    # C. 路径清理与去引号 (核心需求)
+    clean_paths = []
+    for p in paths:
+        p = p.strip()
+        if not p: continue
+
+        # 去除 Windows "复制为路径" 产生的双引号
+        if p.startswith('"') and p.endswith('"'):
+            p = p[1:-1]
+        # 去除可能的单引号
+        elif p.startswith("'") and p.endswith("'"):
+            p = p[1:-1]
+
+        # 再次清理去引号后可能残留的空白
+        p = p.strip()
+
+        if p:
+            clean_paths.append(p)
+    return tuple(clean_paths)
+
+
+def fourcc_to_codec(value):
+    code = int(value)
+    if code <= 0:
+        return ""
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\0 ").lower()
+
+
+def probe_video(path):
+    """
+    用 OpenCV 打开容器读取元数据。无法打开时返回 error 标记的记录 (同样会被缓存，文件变化前不再重试)。
+    """
+    meta = {"fps": DEFAULT_FPS, "frame_count": 0, "duration": 0.0, "width": 0, "height": 0, "codec": "", "error": False}
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            meta["error"] = True
+            return meta
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        meta.update({
+            "fps": float(fps) if fps > 0 else DEFAULT_FPS,
+            "frame_count": max(0, frame_count),
+            "duration": frame_count / fps if fps > 0 and frame_count > 0 else 0.0,
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0),
+            "codec": fourcc_to_codec(cap.get(cv2.CAP_PROP_FOURCC) or 0),
+        })
+    finally:
+        cap.release()
+    return meta
+
+
+class VideoMetaIndex:
+    def __init__(self, store_path=None):
+        self.store_path = store_path
+        self.lock = threading.Lock()
+        self.entries = None # 绝对路径 -> 记录 (含 mtime_ns / size)，首次访问时从磁盘加载
+        self.pending = []   # persist=False 时探测到、尚未写盘的记录
+
+    def _load(self):
+        if self.entries is not None:
+            return
+        self.entries = {}
+        if not self.store_path or not os.path.isfile(self.store_path):
+            return
+        lines = 0
+        try:
+            with open(self.store_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                        self.entries[record["path"]] = record
+                    except (ValueError, KeyError, TypeError):
+                        continue # 跳过损坏的行 (如写入中途被中断)
+        except OSError as e:
+            print(f"[PixNodes] VideoMetaIndex: 无法读取 {self.store_path}: {e}")
+            return
+        if lines > COMPACT_RATIO * max(1, len(self.entries)):
+            self._compact()
+
+    def _compact(self):
+        tmp_path = f"{self.store_path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in self.entries.values():
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.store_path)
+        except OSError as e:
+            print(f"[PixNodes] VideoMetaIndex: 压缩索引失败 {self.store_path}: {e}")
+
+    def _append(self, records):
+        if not self.store_path or not records:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.store_path), exist_ok=True)
+            with open(self.store_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        except OSError as e:
+            print(f"[PixNodes] VideoMetaIndex: 写入索引失败 {self.store_path}: {e}")
+
+    @staticmethod
+    def file_id(path):
+        """
+        返回 (绝对路径, mtime_ns, size)，文件不存在时返回 None。
+        """
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def get(self, path, persist=True):
+        """
+        返回文件的元数据记录；未命中时打开容器探测一次并写入索引。
+        文件不存在或 OpenCV 不可用时返回 None。
+        persist=False 时只更新内存，由调用方在批量探测结束后调用 flush 一次性写盘。
+        """
+        file_id = self.file_id(path)
+        if file_id is None:
+            return None
+        abs_path, mtime_ns, size = file_id
+        with self.lock:
+            self._load()
+            record = self.entries.get(abs_path)
+        if record and record.get("mtime_ns") == mtime_ns and record.get("size") == size:
+            return record
+        if not OPENCV_AVAILABLE:
+            return None
+
+        # 探测在锁外进行，多个线程可并行打开不同的文件
+        try:
+            meta = probe_video(abs_path)
+        except Exception as e:
+            print(f"[PixNodes] VideoMetaIndex: 读取元数据失败 {abs_path}: {e}")
+            return None
+        record = {"path": abs_path, "mtime_ns": mtime_ns, "size": size, **meta}
+        with self.lock:
+            self.entries[abs_path] = record
+            if persist:
+                self._append([record])
+            else:
+                self.pending.append(record)
+        return record
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+            self._append(pending)
+
+
+# 全局共享索引 (跨节点实例与多次执行)
+VIDEO_META_INDEX = VideoMetaIndex(os.path.join(folder_paths.get_user_directory(), "PixNodes", "video_meta.jsonl"))
@@ -0,0 +1,207 @@
+import os
+import hashlib
+import tempfile
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import folder_paths
+
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+# ---------------------------------------------------------------------------
+# PixNodes 视频预览代理 (Proxy)
+# 为分镜预览器中的大尺寸源视频生成低分辨率、低帧率的代理文件，前端滑动预览时只加载代理：
+# - 在后台线程池中用 OpenCV 转码，执行线程不等待；代理就绪前前端继续使用原视频
+# - 按 (绝对路径, mtime, 文件大小, 代理尺寸) 的哈希命名，缓存在 user/PixNodes/video_proxy，跨重启复用；
+#   编码格式在首次使用时确定，代理路径在转码开始前即可知，前端可据此轮询
+# - 缓存目录总大小超过 PROXY_QUOTA_BYTES 时，按最近使用时间淘汰最旧的代理
+# ---------------------------------------------------------------------------
+
+# 代理缓存目录的磁盘配额
+PROXY_QUOTA_BYTES = 2 * 1024 * 1024 * 1024
+
+# 代理的最高帧率：源帧率更高时按整数步长跳帧 (跳过的帧只 grab 不解码为图像)
+PROXY_MAX_FPS = 15.0
+
+# 浏览器可直接播放的编码，按顺序尝试 (取决于 OpenCV 构建所带的 FFmpeg 编码器)
+PROXY_CODECS = (("VP80", ".webm"), ("avc1", ".mp4"))
+
+# 并行转码数：转码同时占用解码与编码，过多会拖慢正在执行的工作流
+PROXY_WORKERS = 2
+
+
+@functools.lru_cache(maxsize=1)
+def proxy_codec():
+    """
+    返回当前 OpenCV 可用的 (fourcc, 扩展名)，均不可用时返回 None。只检测一次。
+    """
+    for fourcc, ext in PROXY_CODECS:
+        fd, test_path = tempfile.mkstemp(suffix=ext)
+        os.close(fd)
+        try:
+            writer = cv2.VideoWriter(test_path, cv2.VideoWriter_fourcc(*fourcc), 15.0, (16, 16))
+            ok = writer.isOpened()
+            writer.release()
+        except Exception:
+            ok = False
+        finally:
+            try:
+                os.remove(test_path)
+            except OSError:
+                pass
+        if ok:
+            return fourcc, ext
+    print("[PixNodes] VideoProxyCache: OpenCV 没有可供浏览器播放的视频编码器 (VP8 / H.264)，不生成预览代理")
+    return None
+
+
+def transcode_proxy(src_path, dst_path, fourcc, max_size):
+    """
+    将 src_path 转码为最长边不超过 max_size、帧率不超过 PROXY_MAX_FPS 的代理视频，写入 dst_path。
+    成功返回 True。
+    """
+    cap = cv2.VideoCapture(src_path)
+    if not cap.isOpened():
+        return False
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        fps = fps if fps > 0 else 30.0
+        src_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        src_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if src_w <= 0 or src_h <= 0:
+            return False
+        scale = min(1.0, max_size / max(src_w, src_h))
+        # 编码器要求偶数尺寸
+        out_w, out_h = max(2, int(src_w * scale) // 2 * 2), max(2, int(src_h * scale) // 2 * 2)
+        step = max(1, round(fps / PROXY_MAX_FPS))
+
+        root, ext = os.path.splitext(dst_path)
+        tmp_path = f"{root}.{threading.get_ident()}.tmp{ext}"
+        writer = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*fourcc), fps / step, (out_w, out_h))
+        if not writer.isOpened():
+            writer.release()
+            return False
+
+        written = 0
+        index = 0
+        try:
+            while True:
+                if index % step == 0:
+                    ok, frame = cap.read()
+                    if not ok:
+                        break
+                    if (frame.shape[1], frame.shape[0]) != (out_w, out_h):
+                        frame = cv2.resize(frame, (out_w, out_h), interpolation=cv2.INTER_AREA)
+                    writer.write(frame)
+                    written += 1
+                elif not cap.grab():
+                    break
+                index += 1
+        finally:
+            writer.release()
+
+        if written == 0:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        os.replace(tmp_path, dst_path)
+        return True
+    finally:
+        cap.release()
+
+
+class VideoProxyCache:
+    def __init__(self, cache_dir, quota_bytes=PROXY_QUOTA_BYTES, workers=PROXY_WORKERS):
+        self.cache_dir = cache_dir
+        self.quota_bytes = quota_bytes
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.executor = None # 首次需要转码时创建
+        self.pending = {} # 代理路径 -> 正在进行的转码
+        self.failed = set() # 转码失败的代理路径，本次会话内不再重试
+
+    @staticmethod
+    def make_key(src_path, max_size):
+        src_path = os.path.abspath(src_path)
+        st = os.stat(src_path)
+        raw = repr((src_path, st.st_mtime_ns, st.st_size, max_size))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+    def _evict(self, keep):
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.is_file() and ".tmp" not in e.name]
+        except OSError:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        total = sum(e.stat().st_size for e in entries)
+        for e in entries:
+            if total <= self.quota_bytes:
+                break
+            if e.path == keep:
+                continue
+            try:
+                total -= e.stat().st_size
+                os.remove(e.path)
+            except OSError:
+                pass
+
+    def _run(self, src_path, path, fourcc, max_size, on_ready):
+        ok = False
+        try:
+            ok = transcode_proxy(src_path, path, fourcc, max_size)
+        except Exception as e:
+            print(f"[PixNodes] VideoProxyCache: 生成代理失败 {src_path}: {e}")
+        with self.lock:
+            self.pending.pop(path, None)
+            if not ok:
+                self.failed.add(path)
+                return
+            self._evict(keep=path)
+        if on_ready is not None:
+            on_ready(path)
+
+    def request(self, src_path, max_size, on_ready=None):
+        """
+        返回 (代理路径, 是否已就绪)：
+        - 已缓存：(路径, True)，并刷新其使用时间
+        - 未缓存：提交后台转码并返回 (路径, False)；完成后以代理路径调用 on_ready
+        - OpenCV 或编码器不可用、源文件不存在、此前转码失败：(None, False)
+        """
+        if not OPENCV_AVAILABLE:
+            return None, False
+        codec = proxy_codec()
+        if codec is None:
+            return None, False
+        fourcc, ext = codec
+        try:
+            path = os.path.join(self.cache_dir, self.make_key(src_path, max_size) + ext)
+        except OSError:
+            return None, False
+
+        if os.path.isfile(path):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return path, True
+
+        with self.lock:
+            if path in self.failed:
+                return None, False
+            if path not in self.pending:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                if self.executor is None:
+                    self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="PixVideoProxy")
+                self.pending[path] = self.executor.submit(self._run, os.path.abspath(src_path), path, fourcc, max_size, on_ready)
+        return path, False
+
+
+# 全局共享 (跨节点实例与多次执行)
+VIDEO_PROXIES = VideoProxyCache(os.path.join(folder_paths.get_user_directory(), "PixNodes", "video_proxy"))
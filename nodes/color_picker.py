@@ -1,6 +1,10 @@
-import torch
+import ast
 import colorsys
 
+import torch
+
+from ._color import hsv_to_rgb_tensor, parse_color, rgb_to_hsv_tensor
+
 # --- 核心修复：通用类型定义 ---
 # 这是一个总是返回 True 的类型，允许任何类型的连接
 # 这样不仅允许我们在 Python 端灵活返回不同类型，
@@ -12,6 +16,110 @@ class AnyType(str):
 ANY = AnyType("*")
 # ----------------
 
+# HSV 输入的标准单位：H(0-360), S(0-100), V(0-100)
+HSV_SCALE = (360.0, 100.0, 100.0)
+
+
+def is_number(x):
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+def split_color_string(text):
+    """
+    批量颜色字符串 -> 条目列表：
+    - 列表字面量 "[[255, 0, 0], [0, 255, 0]]" / '["#FF0000", "#00FF00"]'
+    - 按行或分号分隔，每条为 "255, 0, 0" 或 Hex / 十进制颜色
+    """
+    text = text.strip()
+    if text.startswith("[") or text.startswith("("):
+        try:
+            parsed = ast.literal_eval(text)
+            if isinstance(parsed, (list, tuple)):
+                return list(parsed)
+        except (ValueError, SyntaxError):
+            pass
+    entries = []
+    for line in text.replace(";", "\n").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if "," in line:
+            parts = [p.strip() for p in line.strip("()[]").split(",") if p.strip()]
+            try:
+                entries.append([float(p) if "." in p else int(p) for p in parts])
+                continue
+            except ValueError:
+                pass
+        entries.append(line)
+    return entries
+
+
+def colors_to_rgb_hsv(colors, mode):
+    """
+    将批量颜色输入转换为 (rgb, hsv) 两个 [N, 3] float64 张量 (均为 0.0-1.0)，转换全部为向量化张量运算。
+    colors 支持：
+    - 张量 [..., 3/4] (如 IMAGE 或 [N, 3])
+    - 数值三元组列表：按 mode 解释为 RGB(0-255) 或 HSV(0-360/0-100/0-100)；
+      含浮点且全部不超过 1.0 时视为已归一化 (0.0-1.0)
+    - Hex / 十进制颜色 (字符串或整数)：始终为 RGB，按 _color.parse_color 的规则解析
+    - 以上内容的字符串形式 (见 split_color_string)
+    """
+    if isinstance(colors, str):
+        colors = split_color_string(colors)
+    if isinstance(colors, (list, tuple)) and colors and isinstance(colors[0], (list, tuple)):
+        # 常见情况：纯数值三元组列表，整体一次转为张量，不逐项检查
+        try:
+            colors = torch.tensor(colors)
+        except (TypeError, ValueError, RuntimeError):
+            pass
+
+    if isinstance(colors, torch.Tensor):
+        values = colors.detach().to(device="cpu", dtype=torch.float64)
+        values = values.reshape(-1, values.shape[-1])[:, :3] if values.ndim > 1 else values.reshape(1, -1)[:, :3]
+        normalized = colors.is_floating_point() and values.numel() > 0 and values.max().item() <= 1.0
+        numeric, numeric_rows, parsed, parsed_rows = values, list(range(values.shape[0])), [], []
+    else:
+        if not isinstance(colors, (list, tuple)):
+            colors = [colors]
+        # 单个三元组 [r, g, b]
+        if len(colors) in (3, 4) and all(is_number(x) for x in colors):
+            colors = [colors]
+
+        numeric_list, numeric_rows, parsed, parsed_rows = [], [], [], []
+        for row, item in enumerate(colors):
+            if isinstance(item, (list, tuple)) and len(item) >= 3 and all(is_number(x) for x in item[:3]):
+                numeric_list.append(item[:3])
+                numeric_rows.append(row)
+            else:
+                parsed.append(parse_color(item))
+                parsed_rows.append(row)
+        numeric = torch.tensor(numeric_list, dtype=torch.float64).reshape(-1, 3)
+        normalized = any(isinstance(x, float) for c in numeric_list for x in c) and numeric.max().item() <= 1.0
+
+    total = len(numeric_rows) + len(parsed_rows)
+    if total == 0:
+        raise ValueError("批量颜色输入为空")
+    rgb = torch.empty((total, 3), dtype=torch.float64)
+    hsv = torch.empty((total, 3), dtype=torch.float64)
+
+    if numeric_rows:
+        index = torch.tensor(numeric_rows, dtype=torch.long)
+        if mode == "HSV":
+            in_hsv = numeric if normalized else numeric / torch.tensor(HSV_SCALE, dtype=torch.float64)
+            in_hsv = in_hsv.clamp(0.0, 1.0)
+            rgb[index] = hsv_to_rgb_tensor(in_hsv)
+            hsv[index] = in_hsv
+        else:
+            in_rgb = numeric.clamp(0.0, 1.0) if normalized else numeric.clamp(0.0, 255.0) / 255.0
+            rgb[index] = in_rgb
+            hsv[index] = rgb_to_hsv_tensor(in_rgb)
+    if parsed_rows:
+        index = torch.tensor(parsed_rows, dtype=torch.long)
+        parsed_rgb = torch.tensor(parsed, dtype=torch.float64).clamp(0.0, 1.0)
+        rgb[index] = parsed_rgb
+        hsv[index] = rgb_to_hsv_tensor(parsed_rgb)
+    return rgb, hsv
+
 class ColorPicker:
     """
     PixNodes 自定义拾色器节点
@@ -37,6 +145,12 @@ class ColorPicker:
                 "green": ("INT", {"default": 255, "min": 0, "max": 360, "step": 1, "display": "number"}),
                 "blue": ("INT", {"default": 255, "min": 0, "max": 360, "step": 1, "display": "number"}),
             },
+            "optional": {
+                # 色块尺寸：Image 输出的边长 (像素)，默认 1 与旧版一致
+                "swatch_size": ("INT", {"default": 1, "min": 1, "max": 4096, "step": 1}),
+                # 批量模式：连接颜色数组后一次执行输出整组结果，忽略上面的单色参数
+                "colors": (ANY, {"forceInput": True}),
+            },
         }
 
     # 返回类型设置为 ANY，实际的类型检查交由前端 JS 动态控制
@@ -47,7 +161,10 @@ class ColorPicker:
     FUNCTION = "get_color"
     CATEGORY = "PixNodes"
 
-    def get_color(self, mode, output_format, red, green, blue):
+    def get_color(self, mode, output_format, red, green, blue, swatch_size=1, colors=None):
+        if colors is not None:
+            return (self.get_colors(mode, output_format, colors, swatch_size),)
+
         # 1. 统一归一化处理，计算 H, S, V (0.0 - 1.0) 和 RGB (0-255)
         h, s, v = 0.0, 0.0, 0.0
         r_int, g_int, b_int = 0, 0, 0
@@ -80,7 +197,7 @@ class ColorPicker:
         if output_format == "Image (Tensor)":
             # 创建形状为 [B, H, W, C] 即 [1, 1, 1, 3] 的 Tensor
             tensor_rgb = torch.tensor([r_norm, g_norm, b_norm], dtype=torch.float32)
-            image_tensor = tensor_rgb.reshape(1, 1, 1, 3)
+            image_tensor = tensor_rgb.reshape(1, 1, 1, 3).expand(1, swatch_size, swatch_size, 3).contiguous()
             return (image_tensor,)
 
         elif output_format == "RGB (List)":
@@ -102,6 +219,33 @@ class ColorPicker:
             hex_str = "#{:02X}{:02X}{:02X}".format(r_int, g_int, b_int)
             return (hex_str,)
 
+    def get_colors(self, mode, output_format, colors, swatch_size=1):
+        """
+        批量模式：一次转换整组颜色。
+        Image 输出 [N, swatch_size, swatch_size, 3] 色块批次，其余格式输出与单色格式相同元素组成的列表。
+        """
+        rgb, hsv = colors_to_rgb_hsv(colors, mode)
+
+        if output_format == "Image (Tensor)":
+            count = rgb.shape[0]
+            return rgb.to(torch.float32).view(count, 1, 1, 3).expand(count, swatch_size, swatch_size, 3).contiguous()
+
+        if output_format == "HSV (List)":
+            scaled = hsv * torch.tensor(HSV_SCALE, dtype=torch.float64)
+            return (torch.round(scaled * 100.0) / 100.0).tolist()
+
+        if output_format == "Brightness (Float)":
+            return hsv[:, 2].tolist()
+
+        # 与单色模式的 int(x * 255) 一致按截断取整 (整数 RGB 经 x / 255 * 255 往返在 float64 下是精确的)
+        ints = rgb.mul(255.0).floor_().clamp_(0, 255).to(torch.int64)
+        if output_format == "RGB (List)":
+            return ints.tolist()
+        decimal = ((ints[:, 0] << 16) | (ints[:, 1] << 8) | ints[:, 2]).tolist()
+        if output_format == "Decimal (Int)":
+            return decimal
+        return ["#%06X" % value for value in decimal]
+
 # 导出映射，供 __init__.py 读取
 NODE_CLASS_MAPPINGS = {
     "Pix_ColorPicker": ColorPicker
@@ -1,9 +1,21 @@
 import torch
 import numpy as np
-from PIL import Image, ImageOps, ImageColor
+from PIL import Image, ImageOps
 import folder_paths
 import os
 import json
+import math
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from ._batch_resize import RESAMPLE_OPTIONS, resize_batch
+from ._image_cache import ImageCache
+from ._color import parse_color
+
+# 解码图像缓存：全局共享 (跨节点实例与多次执行)，磁盘层位于 user/PixNodes/image_cache
+IMAGE_CACHE = ImageCache(os.path.join(folder_paths.get_user_directory(), "PixNodes", "image_cache"))
+# cache_mb 为 0 的节点使用的空缓存 (预算为 0，get 总是未命中，put 不写入)
+NO_CACHE = ImageCache()
 
 class CreateImageBatch:
     @classmethod
@@ -15,6 +27,19 @@ class CreateImageBatch:
                 "method": (["fill", "fit", "stretch"], ), 
                 "bg_color": ("STRING", {"default": "#000000", "multiline": False}),
             },
+            "optional": {
+                # PIL 解码与缩放会释放 GIL，线程池可让多张图片并行处理；0 = 自动 (CPU 核心数)，1 = 串行
+                "workers": ("INT", {"default": 0, "min": 0, "max": 64, "step": 1, "tooltip": "并行解码线程数，0 为自动，1 为串行"}),
+                # 快速加载：按目标尺寸降采样解码 (JPEG draft / reduce)；需要原图时 (output_originals) 原图仍完整解码
+                "fast_load": ("BOOLEAN", {"default": False, "label_on": "Fast", "label_off": "Full", "tooltip": "按目标尺寸降采样解码，大图加载更快、更省内存"}),
+                # 解码缓存预算 (MB)：内存与磁盘两级 LRU 各自不超过该预算，0 = 关闭缓存
+                "cache_mb": ("INT", {"default": 0, "min": 0, "max": 65536, "step": 64, "tooltip": "解码缓存预算 (MB)，0 为该节点不使用缓存；缓存由所有节点共享，预算取设置过的最大值"}),
+                # 缩放算法：lanczos 为 PIL 缩放 (旧版行为)；其余与图像列表转批次、组合图像批次共用同一张量重采样器
+                "resample": (["lanczos"] + RESAMPLE_OPTIONS, {"default": "lanczos", "tooltip": "缩放算法，lanczos 为 PIL 缩放，其余为张量重采样"}),
+                # image_list 是否输出原图：关闭后 image_list 输出与 image_batch 相同的缩放帧，
+                # 快速加载模式下可完全跳过原图的完整解码
+                "output_originals": ("BOOLEAN", {"default": True, "label_on": "Original", "label_off": "Batch", "tooltip": "image_list 输出原尺寸图像；关闭时输出缩放后的批次帧"}),
+            },
             "hidden": {
                 # 这是一个关键字段，用于存储前端的图像列表状态
                 "image_data": ("STRING", {"default": "[]"}), 
@@ -28,7 +53,158 @@ class CreateImageBatch:
     FUNCTION = "create_batch"
     CATEGORY = "PixNodes"
     
-    def create_batch(self, batch_width, batch_height, method, bg_color, image_data):
+    def required_size(self, w, h, batch_width, batch_height, method):
+        """
+        计算 method 缩放前所需的最小源尺寸，用于降采样解码。
+        """
+        if method == "stretch":
+            return batch_width, batch_height
+        if method == "fill":
+            ratio = max(batch_width / w, batch_height / h)
+        else: # fit
+            ratio = min(batch_width / w, batch_height / h)
+        return math.ceil(w * ratio), math.ceil(h * ratio)
+
+    def reduce_factor(self, w, h, need_w, need_h):
+        """
+        返回不小于所需尺寸的最大 2 的幂次缩小倍数。
+        """
+        factor = 1
+        while w // (factor * 2) >= need_w and h // (factor * 2) >= need_h:
+            factor *= 2
+        return factor
+
+    def to_float_tensor(self, pixels):
+        """
+        uint8 像素数组 -> float32 Tensor (0-1)。
+        torch.from_numpy 零拷贝包装，只分配一次 float32 内存，除法原地完成。
+        """
+        return torch.from_numpy(pixels).to(torch.float32).div_(255.0)
+
+    def resize_tensor(self, i, batch_width, batch_height, method, color, resample):
+        """
+        使用共享的张量重采样器 (_batch_resize) 缩放单张 PIL 图像，返回 uint8 数组 [batch_height, batch_width, 3]。
+        """
+        src = self.to_float_tensor(np.array(i)).unsqueeze(0)
+        bg_rgb = tuple(c / 255.0 for c in color)
+        frame = resize_batch([src], batch_height, batch_width, method.capitalize(), "Center", bg_rgb, resample=resample)
+        return frame[0].mul_(255.0).round_().clamp_(0, 255).to(torch.uint8).numpy()
+
+    def load_image(self, img_info, batch_width, batch_height, method, color, fast_load=False, keep_original=True, resample="lanczos",
+                   cache=NO_CACHE):
+        """
+        加载并处理单张图像，返回 uint8 像素数组 (原图 [H, W, 3], 批次帧 [batch_height, batch_width, 3])，失败返回 None。
+        keep_original=False 时原图为 None。浮点转换推迟到整批组装时统一进行。
+        cache 为解码缓存 (IMAGE_CACHE 或 NO_CACHE)。
+        可在线程池中并发调用。
+        """
+        filename = img_info.get("filename")
+        subfolder = img_info.get("subfolder", "")
+        img_type = img_info.get("type", "input")
+        
+        # [核心逻辑]：组合子文件夹路径
+        # 这里会自动读取 JS 传过来的 "pix-images" 子文件夹
+        if subfolder:
+            full_path = os.path.join(subfolder, filename)
+        else:
+            full_path = filename
+        
+        # 使用 full_path 获取文件路径
+        image_path = folder_paths.get_annotated_filepath(full_path)
+        
+        # 双重保险：如果 get_annotated_filepath 没找到，尝试手动拼接 input 目录
+        if image_path is None or not os.path.exists(image_path):
+            input_dir = folder_paths.get_input_directory()
+            image_path = os.path.join(input_dir, full_path)
+
+        if not os.path.exists(image_path):
+            print(f"CreateImageBatch: 警告，找不到文件 {full_path}")
+            return None
+
+        # 加载并处理图像
+        try:
+            # --- 缓存查询：键包含 路径、mtime、文件大小 以及所有影响结果的参数 ---
+            use_draft = fast_load and not keep_original
+            stat = os.stat(image_path)
+            file_id = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+            batch_key = cache.make_key("batch", *file_id, method, batch_width, batch_height, tuple(color), fast_load, use_draft, resample)
+            orig_key = cache.make_key("orig", *file_id)
+
+            image_np = cache.get(batch_key)
+            img_np_orig = cache.get(orig_key) if keep_original else None
+            if image_np is not None and (not keep_original or img_np_orig is not None):
+                return img_np_orig, image_np
+
+            i = Image.open(image_path)
+
+            # --- 快速加载：JPEG 直接按 1/2、1/4、1/8 比例解码 ---
+            # draft 必须在 exif_transpose (即真正解码) 之前调用，且作用于未旋转的原始方向
+            if use_draft and i.format == "JPEG":
+                w, h = i.size
+                if i.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                    need_h, need_w = self.required_size(h, w, batch_width, batch_height, method)
+                else:
+                    need_w, need_h = self.required_size(w, h, batch_width, batch_height, method)
+                i.draft("RGB", (need_w, need_h))
+
+            i = ImageOps.exif_transpose(i)
+            
+            if i.mode != 'RGB':
+                i = i.convert('RGB')
+
+            # --- image_list: 保留原图 ---
+            if keep_original and img_np_orig is None:
+                img_np_orig = np.array(i)
+                cache.put(orig_key, img_np_orig)
+
+            # --- 快速加载：其余格式 (或 draft 后仍偏大) 先按 2 的幂次整数倍缩小 ---
+            if fast_load:
+                need_w, need_h = self.required_size(i.size[0], i.size[1], batch_width, batch_height, method)
+                factor = self.reduce_factor(i.size[0], i.size[1], need_w, need_h)
+                if factor > 1:
+                    i = i.reduce(factor)
+
+            # --- image_batch: 根据 method 调整大小 ---
+            w, h = i.size
+
+            if resample != "lanczos":
+                image_np = self.resize_tensor(i, batch_width, batch_height, method, color, resample)
+                cache.put(batch_key, image_np)
+                return img_np_orig, image_np
+
+            if method == "stretch":
+                final_img = i.resize((batch_width, batch_height), Image.LANCZOS)
+                
+            elif method == "fill":
+                ratio = max(batch_width / w, batch_height / h)
+                new_w = int(w * ratio)
+                new_h = int(h * ratio)
+                resized_img = i.resize((new_w, new_h), Image.LANCZOS)
+                
+                left = (new_w - batch_width) // 2
+                top = (new_h - batch_height) // 2
+                final_img = resized_img.crop((left, top, left + batch_width, top + batch_height))
+                
+            else: # fit
+                ratio = min(batch_width / w, batch_height / h)
+                new_w = int(w * ratio)
+                new_h = int(h * ratio)
+                resized_img = i.resize((new_w, new_h), Image.LANCZOS)
+                
+                final_img = Image.new("RGB", (batch_width, batch_height), color)
+                paste_x = (batch_width - new_w) // 2
+                paste_y = (batch_height - new_h) // 2
+                final_img.paste(resized_img, (paste_x, paste_y))
+            
+            image_np = np.array(final_img)
+            cache.put(batch_key, image_np)
+            return img_np_orig, image_np
+        except Exception as e:
+            print(f"CreateImageBatch: 处理图片出错 {filename}: {e}")
+            return None
+
+    def create_batch(self, batch_width, batch_height, method, bg_color, image_data, workers=0, fast_load=False, cache_mb=0,
+                     resample="lanczos", output_originals=True):
         # 1. 解析前端传递的 JSON 数据
         try:
             image_list_data = json.loads(image_data)
@@ -42,98 +218,55 @@ class CreateImageBatch:
             # [修改] 返回 [empty_tensor] 而不是 []，防止 PreviewImage 报错
             return (empty_tensor, [empty_tensor])
 
-        # 3. 解析背景颜色
-        try:
-            if bg_color.startswith("#"):
-                color = ImageColor.getrgb(bg_color)
-            else:
-                color = tuple(map(int, bg_color.replace(" ", "").split(",")))
-        except:
-            print(f"CreateImageBatch: 颜色解析失败 '{bg_color}'，使用黑色。")
-            color = (0, 0, 0)
-
-        output_tensors = []
-        original_tensor_list = [] 
-
-        # 4. 遍历处理图像
-        for img_info in image_list_data:
-            filename = img_info.get("filename")
-            subfolder = img_info.get("subfolder", "")
-            img_type = img_info.get("type", "input")
-            
-            # [核心逻辑]：组合子文件夹路径
-            # 这里会自动读取 JS 传过来的 "pix-images" 子文件夹
-            if subfolder:
-                full_path = os.path.join(subfolder, filename)
-            else:
-                full_path = filename
-            
-            # 使用 full_path 获取文件路径
-            image_path = folder_paths.get_annotated_filepath(full_path)
-            
-            # 双重保险：如果 get_annotated_filepath 没找到，尝试手动拼接 input 目录
-            if image_path is None or not os.path.exists(image_path):
-                input_dir = folder_paths.get_input_directory()
-                image_path = os.path.join(input_dir, full_path)
-
-            if not os.path.exists(image_path):
-                print(f"CreateImageBatch: 警告，找不到文件 {full_path}")
-                continue
-
-            # 加载并处理图像
-            try:
-                i = Image.open(image_path)
-                i = ImageOps.exif_transpose(i)
-                
-                if i.mode != 'RGB':
-                    i = i.convert('RGB')
+        # 3. 解析背景颜色 (与其他图像节点共用解析规则，解析失败使用黑色)
+        color = tuple(round(c * 255) for c in parse_color(bg_color, default_color=(0.0, 0.0, 0.0)))
 
-                # --- image_list: 保留原图 ---
-                img_np_orig = np.array(i).astype(np.float32) / 255.0
-                img_tensor_orig = torch.from_numpy(img_np_orig).unsqueeze(0) 
-                original_tensor_list.append(img_tensor_orig)
+        # 缓存在进程内共享：预算只增不减，cache_mb 为 0 的节点不读写缓存，不影响其他节点已缓存的内容
+        cache = IMAGE_CACHE if cache_mb > 0 else NO_CACHE
+        if cache_mb > 0:
+            IMAGE_CACHE.raise_budget(cache_mb * 1024 * 1024)
 
-                # --- image_batch: 根据 method 调整大小 ---
-                w, h = i.size
+        # 4. 并行加载并处理图像 (executor.map 保证结果顺序与输入一致)
+        # 只有快速加载且不输出原图时才跳过原图：非快速加载时原图本来就会完整解码，保留它没有额外开销
+        keep_original = not fast_load or output_originals
+        load = functools.partial(
+            self.load_image,
+            batch_width=batch_width, batch_height=batch_height, method=method, color=color,
+            fast_load=fast_load, keep_original=keep_original, resample=resample, cache=cache
+        )
 
-                if method == "stretch":
-                    final_img = i.resize((batch_width, batch_height), Image.LANCZOS)
-                    
-                elif method == "fill":
-                    ratio = max(batch_width / w, batch_height / h)
-                    new_w = int(w * ratio)
-                    new_h = int(h * ratio)
-                    resized_img = i.resize((new_w, new_h), Image.LANCZOS)
-                    
-                    left = (new_w - batch_width) // 2
-                    top = (new_h - batch_height) // 2
-                    final_img = resized_img.crop((left, top, left + batch_width, top + batch_height))
-                    
-                else: # fit
-                    ratio = min(batch_width / w, batch_height / h)
-                    new_w = int(w * ratio)
-                    new_h = int(h * ratio)
-                    resized_img = i.resize((new_w, new_h), Image.LANCZOS)
-                    
-                    final_img = Image.new("RGB", (batch_width, batch_height), color)
-                    paste_x = (batch_width - new_w) // 2
-                    paste_y = (batch_height - new_h) // 2
-                    final_img.paste(resized_img, (paste_x, paste_y))
-                
-                image_np = np.array(final_img).astype(np.float32) / 255.0
-                image_tensor = torch.from_numpy(image_np)
-                output_tensors.append(image_tensor)
-            except Exception as e:
-                print(f"CreateImageBatch: 处理图片出错 {filename}: {e}")
-                continue
-
-        if not output_tensors:
+        if workers <= 0:
+            workers = min(32, os.cpu_count() or 1)
+        workers = max(1, min(workers, len(image_list_data)))
+
+        if workers == 1:
+            results = [load(img_info) for img_info in image_list_data]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(load, image_list_data))
+
+        results = [r for r in results if r is not None]
+
+        if not results:
              # 如果所有图片都加载失败，返回全黑图
              empty_tensor = torch.zeros((1, batch_height, batch_width, 3), dtype=torch.float32)
              # [修复] 第二个参数返回 [empty_tensor] 而不是 []，避免下游 PreviewImage 报错
              return (empty_tensor, [empty_tensor])
 
-        batch_tensor = torch.stack(output_tensors, dim=0)
+        # 5. uint8 端到端：先把所有帧写入一个预分配的 uint8 缓冲区，
+        #    再整批转换为 float32 并原地除以 255，避免逐帧 astype 产生的多份中间数组
+        batch_np = np.empty((len(results), batch_height, batch_width, 3), dtype=np.uint8)
+        for idx, (_, image_np) in enumerate(results):
+            batch_np[idx] = image_np
+        batch_tensor = self.to_float_tensor(batch_np)
+
+        original_tensor_list = []
+        for idx, (img_np_orig, _) in enumerate(results):
+            if img_np_orig is not None:
+                original_tensor_list.append(self.to_float_tensor(img_np_orig).unsqueeze(0))
+            else:
+                # output_originals 关闭时，image_list 按设置输出批次帧
+                original_tensor_list.append(batch_tensor[idx:idx + 1])
         
         return (batch_tensor, original_tensor_list)
 
@@ -0,0 +1,134 @@
+import os
+
+import folder_paths
+
+from ._disk_batch import DiskBatch, write_disk_batch
+
+DISK_BATCH_EXT = ".pixb"
+
+
+def base_directory(location):
+    if location == "Output":
+        return folder_paths.get_output_directory()
+    return folder_paths.get_temp_directory()
+
+
+def resolve_batch_path(path):
+    """
+    绝对路径直接使用；相对路径依次在输出目录、临时目录中查找。
+    """
+    path = path.strip().strip('"').strip("'")
+    if not path:
+        return None
+    if not path.endswith(DISK_BATCH_EXT):
+        path += DISK_BATCH_EXT
+    if os.path.isabs(path):
+        return path
+    for location in ("Output", "Temp"):
+        candidate = os.path.join(base_directory(location), path)
+        if os.path.isfile(candidate):
+            return candidate
+    return os.path.join(base_directory("Output"), path)
+
+
+class SaveDiskBatch:
+    """
+    将 IMAGE 批次写入内存映射的磁盘批次文件 (.pixb)，输出可在节点间传递的惰性视图。
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "images": ("IMAGE",),
+                "filename": ("STRING", {"default": "PixNodes/disk_batch", "multiline": False}),
+                "location": (["Temp", "Output"], {"default": "Temp"}),
+                "dtype": (["uint8", "float16"], {"default": "uint8"}),
+                "append": ("BOOLEAN", {"default": False, "label_on": "Append", "label_off": "Overwrite"}),
+            }
+        }
+
+    RETURN_TYPES = ("PIX_DISK_BATCH", "STRING", "INT")
+    RETURN_NAMES = ("disk_batch", "path", "frame_count")
+    FUNCTION = "save"
+    CATEGORY = "PixNodes"
+    OUTPUT_NODE = True
+
+    def save(self, images, filename, location, dtype, append):
+        base_dir = os.path.abspath(base_directory(location))
+        name = filename.strip() or "PixNodes/disk_batch"
+        if not name.endswith(DISK_BATCH_EXT):
+            name += DISK_BATCH_EXT
+        path = os.path.abspath(os.path.join(base_dir, name))
+        # 防止通过 ../ 写出目标目录
+        if os.path.commonpath([base_dir, path]) != base_dir:
+            raise ValueError(f"文件名超出了 {location} 目录: {filename}")
+
+        disk_batch = write_disk_batch(path, images, dtype=dtype, append=append)
+        return (disk_batch, disk_batch.path, len(disk_batch))
+
+
+class LoadDiskBatch:
+    """
+    从磁盘批次读取指定帧范围为 IMAGE，只有被选中的帧会从映射文件中换入并转换。
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "start": ("INT", {"default": 0, "min": 0, "max": 0xffffffff, "step": 1}),
+                "count": ("INT", {"default": 0, "min": 0, "max": 0xffffffff, "step": 1}),
+                "stride": ("INT", {"default": 1, "min": 1, "max": 10000, "step": 1}),
+            },
+            "optional": {
+                "disk_batch": ("PIX_DISK_BATCH",),
+                "path": ("STRING", {"default": "", "multiline": False, "placeholder": "未连接磁盘批次时，按路径读取 .pixb 文件"}),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE", "INT")
+    RETURN_NAMES = ("images", "frame_count")
+    FUNCTION = "load"
+    CATEGORY = "PixNodes"
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        # 按路径读取时文件可能在外部被追加/覆盖，以修改时间和大小判断是否需要重新执行。
+        # IS_CHANGED 只能拿到控件值 (连接的输入为 None)：连接 disk_batch 时由上游 Save 节点的重新执行触发失效
+        path = kwargs.get("path") or ""
+        params = "|".join(str(kwargs.get(k)) for k in ("start", "count", "stride"))
+        file_path = resolve_batch_path(path)
+        if file_path and os.path.isfile(file_path):
+            stat = os.stat(file_path)
+            return f"{file_path}|{stat.st_mtime_ns}|{stat.st_size}|{params}"
+        return f"{path}|{params}"
+
+    def load(self, start, count, stride, disk_batch=None, path=""):
+        if disk_batch is None:
+            file_path = resolve_batch_path(path or "")
+            if file_path is None:
+                raise ValueError("请连接磁盘批次或填写 .pixb 文件路径")
+            if not os.path.isfile(file_path):
+                raise FileNotFoundError(f"磁盘批次文件不存在: {file_path}")
+        else:
+            file_path = disk_batch.path
+        # 重新读取文件头，确保拿到追加后的最新帧数
+        disk_batch = DiskBatch(file_path)
+
+        total = len(disk_batch)
+        if total == 0 or start >= total:
+            raise ValueError(f"起始帧 {start} 超出范围 (共 {total} 帧)")
+        stop = total if count == 0 else min(total, start + count * stride)
+        return (disk_batch[start:stop:stride], total)
+
+
+NODE_CLASS_MAPPINGS = {
+    "Pix_SaveDiskBatch": SaveDiskBatch,
+    "Pix_LoadDiskBatch": LoadDiskBatch,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "Pix_SaveDiskBatch": "Save Disk Batch (PixNodes)",
+    "Pix_LoadDiskBatch": "Load Disk Batch (PixNodes)",
+}
@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import tempfile
+
+import numpy as np
+import torch
+import folder_paths
+
+from ._video_meta import OPENCV_AVAILABLE, VIDEO_META_INDEX, DEFAULT_FPS, probe_video
+
+if OPENCV_AVAILABLE:
+    import cv2
+
+# 相邻两个目标帧的间隔不超过该帧数时顺序 grab (只解复用/解码、不转换为图像) 前进，否则直接 seek。
+# seek 需要回到前一个关键帧再解码到目标帧，小间隔时反而比顺序前进慢
+SEEK_MIN_GAP = 48
+
+# 帧范围语法：单帧 "12"、闭区间 "0-100"、带步长 "0-100:10"、到结尾 "200-" / "200-:5"
+FRAME_TOKEN_RE = re.compile(r"^(\d+)(?:-(\d*))?(?::(\d+))?$")
+
+
+def parse_frame_spec(spec, frame_count):
+    """
+    解析帧范围文本 (逗号 / 空白 / 分号分隔)，返回帧号列表 (保持书写顺序，可重复)。
+    frame_count 未知 (0) 时不截断，超出结尾的帧在解码时丢弃。
+    """
+    frames = []
+    for token in re.split(r"[,;\s]+", spec.strip()):
+        if not token:
+            continue
+        match = FRAME_TOKEN_RE.match(token)
+        if not match:
+            raise ValueError(f"Pix_ExtractVideoFrames: 无法解析帧范围 '{token}'")
+        start = int(match.group(1))
+        step = int(match.group(3) or 1)
+        if step <= 0:
+            raise ValueError(f"Pix_ExtractVideoFrames: 步长必须大于 0 '{token}'")
+        if match.group(2) is None:
+            frames.append(start)
+            continue
+        if match.group(2):
+            end = int(match.group(2))
+        elif frame_count > 0:
+            end = frame_count - 1
+        else:
+            raise ValueError(f"Pix_ExtractVideoFrames: 无法读取视频帧数，'{token}' 需要写明结束帧")
+        if frame_count > 0:
+            end = min(end, frame_count - 1)
+        frames.extend(range(start, end + 1, step))
+    return frames
+
+
+def select_frames(mode, frames, stride, count, frame_count):
+    if mode == "ranges":
+        return parse_frame_spec(frames, frame_count)
+    if frame_count <= 0:
+        raise ValueError(f"Pix_ExtractVideoFrames: 无法读取视频帧数，{mode} 模式不可用，请改用 ranges")
+    if mode == "stride":
+        return list(range(0, frame_count, stride))
+    # count：在整段视频上均匀取 count 帧 (含首尾)
+    if count <= 1:
+        return [0]
+    count = min(count, frame_count)
+    return sorted({round(i * (frame_count - 1) / (count - 1)) for i in range(count)})
+
+
+def decode_frames(path, targets):
+    """
+    按升序帧号 targets 解码，写入预分配的 uint8 缓冲区 [N, H, W, 3] (RGB)。
+    返回 (缓冲区, 实际解码的帧数)；视频提前结束时只有前若干帧有效。
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Pix_ExtractVideoFrames: 无法打开视频 {path}")
+    try:
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        buffer = np.empty((len(targets), height, width, 3), dtype=np.uint8)
+        pos = 0 # 下一次 grab 得到的帧号
+        decoded = 0
+        for target in targets:
+            gap = target - pos
+            if gap > SEEK_MIN_GAP:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                pos = target
+            # 跳过的帧只 grab，不做 retrieve (颜色转换与拷贝)
+            while pos < target and cap.grab():
+                pos += 1
+            if pos < target or not cap.grab():
+                break
+            pos += 1
+            ok, frame = cap.retrieve()
+            if not ok:
+                break
+            if frame.shape[0] != height or frame.shape[1] != width:
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            # 直接转换到缓冲区中，不产生中间数组
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=buffer[decoded])
+            decoded += 1
+    finally:
+        cap.release()
+    return buffer, decoded
+
+
+class ExtractVideoFrames:
+    """
+    按帧范围 / 步长 / 数量从视频中抽取帧，输出 IMAGE 批次。
+    只解码需要的帧：间隔较大时通过 CAP_PROP_POS_FRAMES 跳转，间隔较小时顺序 grab，
+    解码结果直接写入预分配的 uint8 缓冲区。
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                # ranges：按 frames 中的帧范围；stride：每隔 stride 帧取一帧；count：整段均匀取 count 帧
+                "mode": (["ranges", "stride", "count"], {"default": "ranges"}),
+                "frames": ("STRING", {"default": "0-15"}),
+                "stride": ("INT", {"default": 10, "min": 1, "max": 100000, "step": 1}),
+                "count": ("INT", {"default": 16, "min": 1, "max": 10000, "step": 1}),
+            },
+            "optional": {
+                # 两者都连接时优先使用 video_path
+                "video_path": ("STRING", {"forceInput": True}),
+                "video": ("VIDEO",),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE", "STRING", "FLOAT", "INT")
+    RETURN_NAMES = ("images", "frame_indices", "fps", "frame_count")
+
+    FUNCTION = "extract_frames"
+    CATEGORY = "PixNodes/video"
+
+    @staticmethod
+    def resolve_video(video_path, video):
+        """
+        返回 (本地路径, 是否为临时文件)。VIDEO 对象的来源为内存数据时写入临时文件。
+        """
+        if video_path:
+            path = video_path.strip().strip('"').strip("'")
+            if not os.path.exists(path):
+                path = folder_paths.get_annotated_filepath(path) or path
+            return path, False
+        if video is None:
+            raise ValueError("Pix_ExtractVideoFrames: 需要连接 video_path 或 video")
+
+        source = video.get_stream_source() if hasattr(video, "get_stream_source") else None
+        if isinstance(source, str):
+            return source, False
+        temp_dir = folder_paths.get_temp_directory()
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".mp4", dir=temp_dir)
+        with os.fdopen(fd, "wb") as f:
+            if source is not None:
+                source.seek(0)
+                f.write(source.read())
+        if source is None:
+            video.save_to(tmp_path)
+        return tmp_path, True
+
+    def extract_frames(self, mode, frames, stride, count, video_path=None, video=None):
+        if not OPENCV_AVAILABLE:
+            raise RuntimeError("Pix_ExtractVideoFrames: 需要安装 OpenCV (opencv-python)")
+
+        path, is_temp = self.resolve_video(video_path, video)
+        try:
+            # 帧数 / 帧率来自共享元数据索引 (同一文件只打开一次容器)；临时文件不写入索引
+            meta = probe_video(path) if is_temp else VIDEO_META_INDEX.get(path)
+            if meta is None or meta["error"]:
+                raise ValueError(f"Pix_ExtractVideoFrames: 无法打开视频 {path}")
+            frame_count = meta["frame_count"]
+
+            requested = select_frames(mode, frames, stride, count, frame_count)
+            # 按帧号升序各解码一次，再按请求顺序 (可能重复) 排列
+            targets = sorted(set(requested))
+            buffer, decoded = decode_frames(path, targets)
+        finally:
+            if is_temp:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        slot = {frame: i for i, frame in enumerate(targets[:decoded])}
+        order = [slot[frame] for frame in requested if frame in slot]
+        if not order:
+            raise ValueError(f"Pix_ExtractVideoFrames: 没有可解码的帧 (视频共 {frame_count} 帧)")
+
+        pixels = torch.from_numpy(buffer[:decoded])
+        if order != list(range(decoded)):
+            pixels = pixels[torch.tensor(order, dtype=torch.long)]
+        images = pixels.to(torch.float32).div_(255.0)
+
+        frame_indices = [targets[i] for i in order]
+        fps = meta["fps"] or DEFAULT_FPS
+        return (images, json.dumps(frame_indices), float(fps), frame_count)
+
+
+NODE_CLASS_MAPPINGS = {
+    "Pix_ExtractVideoFrames": ExtractVideoFrames
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "Pix_ExtractVideoFrames": "Extract Video Frames (PixNodes)"
+}
@@ -1,9 +1,8 @@
-import json
 import os
-import shutil
-import hashlib
 import folder_paths
-import re # [新增] 用于强大的字符串分割
+
+from ._preview_links import PREVIEW_LINKS
+from ._video_meta import DEFAULT_FPS, VIDEO_META_INDEX, parse_path_list
 
 # 尝试导入新 API
 try:
@@ -13,12 +12,6 @@ except ImportError:
     NEW_API_AVAILABLE = False
     print("PixNodes Warning: 'comfy_api.latest' not found. Video output requires ComfyUI V0.3+.")
 
-# 仅用于获取预览帧率 (Metadata)，不用于解码数据
-try:
-    import cv2
-    OPENCV_AVAILABLE = True
-except ImportError:
-    OPENCV_AVAILABLE = False
 
 class GetVideoFromPathList:
     """
@@ -62,43 +55,8 @@ class GetVideoFromPathList:
             print(f"PixNodes Warning: Invalid index value '{index}', defaulting to 0.")
             index = 0
 
-        # --- 1. 路径解析逻辑 (增强版) ---
-        paths = []
-        text = video_paths_json.strip()
-        
-        # A. 尝试 JSON 解析 (最严格)
-        try:
-            if text.startswith("[") and text.endswith("]"):
-                loaded = json.loads(text)
-                if isinstance(loaded, list):
-                    paths = [str(item) for item in loaded]
-        except json.JSONDecodeError:
-            pass
-
-        # B. 如果不是 JSON，使用正则处理多种分隔符
-        if not paths:
-            # 使用正则按 [逗号 或 换行符] 进行分割，过滤掉空项
-            # r'[,\n\r]+' 意味着匹配一个或多个连续的逗号、换行或回车
-            paths = [x for x in re.split(r'[,\n\r]+', text) if x.strip()]
-
-        # C. 路径清理与去引号 (核心需求)
-        clean_paths = []
-        for p in paths:
-            p = p.strip()
-            if not p: continue
-            
-            # 去除 Windows "复制为路径" 产生的双引号
-            if p.startswith('"') and p.endswith('"'):
-                p = p[1:-1]
-            # 去除可能的单引号
-            elif p.startswith("'") and p.endswith("'"):
-                p = p[1:-1]
-            
-            # 再次清理去引号后可能残留的空白
-            p = p.strip()
-            
-            if p:
-                clean_paths.append(p)
+        # --- 1. 路径解析逻辑 (增强版，按文本缓存) ---
+        clean_paths = parse_path_list(video_paths_json)
 
         if not clean_paths:
             # 错误时返回空
@@ -111,42 +69,24 @@ class GetVideoFromPathList:
         video_name = os.path.basename(selected_video_path)
 
         # --- 2. 前端预览准备 (UI) ---
-        # 建立软链接到 temp 目录，供前端 JS 播放器访问
-        path_hash = hashlib.md5(selected_video_path.encode('utf-8')).hexdigest()[:8]
-        preview_filename = f"pix_preview_{path_hash}_{video_name}"
-        preview_path = os.path.join(self.output_dir, preview_filename)
-
-        if not os.path.exists(preview_path):
-            try:
-                # 优先尝试硬链接，失败则尝试复制
-                if hasattr(os, 'link'):
-                    try:
-                        os.link(selected_video_path, preview_path)
-                    except OSError:
-                        shutil.copy2(selected_video_path, preview_path)
-                else:
-                    shutil.copy2(selected_video_path, preview_path)
-            except Exception as e:
-                pass
-
-        # 获取帧率仅用于 UI 时间码显示
-        fps = 30.0
-        if OPENCV_AVAILABLE:
-            try:
-                cap = cv2.VideoCapture(selected_video_path)
-                if cap.isOpened():
-                    fps = cap.get(cv2.CAP_PROP_FPS)
-                cap.release()
-            except:
-                pass
+        # 链接到 temp 目录供前端播放器访问：符号链接/硬链接优先，必要时在后台复制，超出配额按 LRU 淘汰
+        preview = PREVIEW_LINKS.get(selected_video_path, "pix_preview")
+
+        # 帧率用于 UI 时间码显示：从元数据索引读取，同一文件 (路径 + mtime + 大小) 只打开一次容器
+        meta = VIDEO_META_INDEX.get(selected_video_path)
+        video_info = {
+            "filename": preview["filename"] if preview else "",
+            "type": self.type,
+            "subfolder": "",
+            "fps": meta["fps"] if meta else DEFAULT_FPS,
+            "pending": preview["pending"] if preview else False,
+        }
+        if meta:
+            for key in ("frame_count", "duration", "width", "height", "codec"):
+                video_info[key] = meta[key]
 
         ui_data = {
-            "video": [{
-                "filename": preview_filename,
-                "type": self.type,
-                "subfolder": "",
-                "fps": fps
-            }]
+            "video": [video_info]
         }
 
         # --- 3. 核心输出逻辑 ---
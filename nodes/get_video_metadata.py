@@ -0,0 +1,76 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from ._video_meta import VIDEO_META_INDEX, OPENCV_AVAILABLE, parse_path_list
+
+
+class GetVideoMetadata:
+    """
+    批量读取路径列表中所有视频的元数据 (fps / 帧数 / 时长 / 分辨率 / 编码)，输出 JSON 表格。
+    路径解析规则与 GetVideoFromPathList 相同；探测在线程池中并行执行，并复用共享的元数据索引，
+    已探测且未修改的文件不会再次打开。
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "video_paths_json": ("STRING", {"forceInput": True}),
+                # 并行探测的线程数 (打开容器主要是 I/O 等待，可高于 CPU 核心数)
+                "max_workers": ("INT", {"default": 8, "min": 1, "max": 64, "step": 1}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "FLOAT", "INT")
+    RETURN_NAMES = ("metadata_json", "total_duration", "total")
+
+    FUNCTION = "get_metadata"
+    CATEGORY = "PixNodes/video"
+
+    def get_metadata(self, video_paths_json, max_workers=8):
+        paths = parse_path_list(video_paths_json)
+        if not paths:
+            return ("[]", 0.0, 0)
+        if not OPENCV_AVAILABLE:
+            print("PixNodes Warning: OpenCV (cv2) not found. Video metadata will be empty.")
+
+        # 重复的路径只探测一次；新探测的记录在全部完成后一次性写入索引文件
+        unique_paths = list(dict.fromkeys(paths))
+        workers = max(1, min(max_workers, len(unique_paths)))
+        if workers == 1:
+            records = [VIDEO_META_INDEX.get(p, persist=False) for p in unique_paths]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                records = list(executor.map(lambda p: VIDEO_META_INDEX.get(p, persist=False), unique_paths))
+        VIDEO_META_INDEX.flush()
+        by_path = dict(zip(unique_paths, records))
+
+        table = []
+        total_duration = 0.0
+        for index, path in enumerate(paths):
+            record = by_path[path]
+            row = {
+                "index": index,
+                "path": path,
+                "name": os.path.basename(path),
+                "exists": record is not None or os.path.isfile(path),
+            }
+            if record is not None:
+                for key in ("fps", "frame_count", "duration", "width", "height", "codec", "error"):
+                    row[key] = record[key]
+                total_duration += record["duration"]
+            else:
+                row["error"] = True
+            table.append(row)
+
+        return (json.dumps(table, ensure_ascii=False), total_duration, len(paths))
+
+
+NODE_CLASS_MAPPINGS = {
+    "Pix_GetVideoMetadata": GetVideoMetadata
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "Pix_GetVideoMetadata": "Get Video Metadata (PixNodes)"
+}
@@ -1,6 +1,102 @@
+import os
+import json
+import math
 import torch
+import torch.nn.functional as F
+import folder_paths
 from nodes import PreviewImage
 
+from ._batch_resize import RESIZE_CHUNK_BYTES, interpolate_nhwc
+from ._preview import PREVIEW_FORMATS, downscale_frames, frame_fingerprint, save_previews, to_cpu_frames
+
+# 完全相同的图像 MSE 为 0，PSNR 为无穷大；为保证 JSON 可序列化，以此值封顶
+PSNR_CAP = 100.0
+
+# SSIM 近似：在亮度通道上使用 7x7 均值窗口 (代替 11x11 高斯窗口)，常数取标准值 (数据范围 0~1)
+SSIM_WINDOW = 7
+SSIM_C1 = 0.01 ** 2
+SSIM_C2 = 0.03 ** 2
+
+# 差异热力图色表 (黑 -> 紫 -> 红 -> 橙 -> 浅黄)，按差异大小线性插值
+HEATMAP_COLORS = (
+    (0.0, 0.0, 0.0),
+    (0.33, 0.05, 0.55),
+    (0.85, 0.15, 0.30),
+    (1.0, 0.60, 0.0),
+    (1.0, 1.0, 0.65),
+)
+
+
+def pair_batches(a, b):
+    """
+    将两组批次配对：批次数为 1 的一方广播到另一方，否则取较短的长度；尺寸不同时把 b 缩放到 a 的尺寸。
+    """
+    if a.shape[0] == 1 and b.shape[0] > 1:
+        a = a.expand(b.shape[0], -1, -1, -1)
+    elif b.shape[0] == 1 and a.shape[0] > 1:
+        b = b.expand(a.shape[0], -1, -1, -1)
+    count = min(a.shape[0], b.shape[0])
+    a, b = a[:count, :, :, :3], b[:count, :, :, :3].to(device=a.device, dtype=a.dtype)
+    if b.shape[1:3] != a.shape[1:3]:
+        b = interpolate_nhwc(b, (a.shape[1], a.shape[2]), "bilinear_antialias")
+    return a, b
+
+
+def apply_heatmap(values):
+    """
+    values: [N, H, W]，0~1 -> 热力图 [N, H, W, 3]。
+    """
+    table = torch.tensor(HEATMAP_COLORS, dtype=values.dtype, device=values.device)
+    pos = values.clamp(0.0, 1.0) * (len(HEATMAP_COLORS) - 1)
+    low = pos.floor().long().clamp_(max=len(HEATMAP_COLORS) - 2)
+    frac = (pos - low).unsqueeze(-1)
+    return torch.lerp(table[low], table[low + 1], frac)
+
+
+def ssim_approx(a_luma, b_luma):
+    """
+    a_luma, b_luma: [N, 1, H, W] -> 每对的平均 SSIM [N]。
+    """
+    pool = lambda x: F.avg_pool2d(x, SSIM_WINDOW, stride=1, padding=SSIM_WINDOW // 2, count_include_pad=False)
+    mu_a, mu_b = pool(a_luma), pool(b_luma)
+    var_a = pool(a_luma * a_luma) - mu_a * mu_a
+    var_b = pool(b_luma * b_luma) - mu_b * mu_b
+    cov = pool(a_luma * b_luma) - mu_a * mu_b
+    ssim_map = ((2 * mu_a * mu_b + SSIM_C1) * (2 * cov + SSIM_C2)) / \
+               ((mu_a * mu_a + mu_b * mu_b + SSIM_C1) * (var_a + var_b + SSIM_C2))
+    return ssim_map.mean(dim=(1, 2, 3))
+
+
+def compare_metrics(a, b):
+    """
+    批量计算每对图像的 差异热力图、MSE、PSNR、SSIM 近似值 (全部为张量运算，在输入所在设备上执行)。
+    按 RESIZE_CHUNK_BYTES 分块，峰值内存只与块大小有关。
+    返回 (heatmap [N, H, W, 3], [{"mse", "psnr", "ssim", "max_diff"}, ...])
+    """
+    a, b = pair_batches(a, b)
+    count, h, w = a.shape[0], a.shape[1], a.shape[2]
+    heatmap = torch.empty((count, h, w, 3), dtype=torch.float32, device=a.device)
+    luma_weights = torch.tensor([0.299, 0.587, 0.114], dtype=torch.float32, device=a.device)
+    chunk = max(1, RESIZE_CHUNK_BYTES // (h * w * 3 * 4))
+
+    metrics = []
+    for start in range(0, count, chunk):
+        ca = a[start:start + chunk].float()
+        cb = b[start:start + chunk].float()
+        diff = ca - cb
+        mse = diff.square().mean(dim=(1, 2, 3))
+        abs_diff = diff.abs().mean(dim=3)
+        max_diff = abs_diff.amax(dim=(1, 2))
+        # 热力图按每对的最大差异归一化，细微差异也清晰可见；绝对大小见 max_diff
+        heatmap[start:start + chunk] = apply_heatmap(abs_diff / max_diff.clamp(min=1e-8).view(-1, 1, 1))
+        ssim = ssim_approx((ca @ luma_weights).unsqueeze(1), (cb @ luma_weights).unsqueeze(1))
+
+        for m, s, md in zip(mse.tolist(), ssim.tolist(), max_diff.tolist()):
+            psnr = PSNR_CAP if m <= 0 else min(PSNR_CAP, 10.0 * math.log10(1.0 / m))
+            metrics.append({"mse": m, "psnr": psnr, "ssim": s, "max_diff": md})
+    return heatmap, metrics
+
+
 class ImageComparer(PreviewImage):
     """
     Pix Image Comparer
@@ -14,6 +110,16 @@ class ImageComparer(PreviewImage):
             "optional": {
                 "foreground_image": ("IMAGE",), # 原 image_a
                 "background_image": ("IMAGE",), # 原 image_b
+                # 预览范围：All 编码整个批次；Selected 只编码 frame_index 指定的一对帧
+                "preview_mode": (["All", "Selected"], {"default": "All"}),
+                "frame_index": ("INT", {"default": 0, "min": 0, "max": 100000, "step": 1}),
+                # 预览尺寸：最长边 (像素)，0 表示原尺寸
+                "preview_size": ("INT", {"default": 0, "min": 0, "max": 8192, "step": 8}),
+                # 预览格式：png 为 ComfyUI 标准预览 (含工作流元数据)；其余为快速编码，不写元数据
+                "preview_format": (list(PREVIEW_FORMATS.keys()), {"default": "png"}),
+                # 差异指标：计算每对图像的 MSE / PSNR / SSIM，在节点上显示并写入各输出端口；关闭时输出为 0
+                # (是否计算只由该开关决定：输出缓存不区分端口是否连接，不能按连接情况决定)
+                "metrics": ("BOOLEAN", {"default": False, "label_on": "On", "label_off": "Off"}),
             },
             "hidden": {
                 "prompt": "PROMPT",
@@ -21,40 +127,127 @@ class ImageComparer(PreviewImage):
             },
         }
 
-    # 虽然没有输出连接，但定义为输出节点以确保执行
-    RETURN_TYPES = ()
+    # 输出节点：即使输出未连接也会执行
+    RETURN_TYPES = ("IMAGE", "FLOAT", "FLOAT", "FLOAT", "STRING")
+    RETURN_NAMES = ("diff_heatmap", "mse", "psnr", "ssim", "metrics_json")
     OUTPUT_NODE = True
     CATEGORY = "PixNodes"
     FUNCTION = "compare_images"
-    
+
     # 注册名称
     NODE_NAME = "Pix_ImageComparer"
     DISPLAY_NAME = "Image Comparer (PixNodes)"
 
+    def __init__(self):
+        super().__init__()
+        # 上一次执行的 (输入指纹 + 参数) 及其结果，输入未变化且文件仍在时直接复用
+        self.last_key = None
+        self.last_result = None
+
+    def select_frames(self, images, preview_mode, frame_index):
+        # 先切片再搬到 CPU：Selected 模式只拷贝一帧
+        if preview_mode == "Selected":
+            index = min(frame_index, images.shape[0] - 1)
+            images = images[index:index + 1]
+        return to_cpu_frames(images)
+
+    def write_fast_previews(self, frames, side, preview_size, preview_format, filename_prefix):
+        """
+        快速预览：按帧指纹命名 (内容寻址)，已存在的文件直接复用；缺失的帧一次性缩小后并行编码。
+        """
+        output_dir = folder_paths.get_temp_directory()
+        ext = PREVIEW_FORMATS[preview_format][0]
+        results, missing, missing_paths = [], [], []
+        for idx, frame in enumerate(frames):
+            file_name = f"{filename_prefix}{side}_{frame_fingerprint(frame)}_{preview_size}_{preview_format}.{ext}"
+            full_path = os.path.join(output_dir, file_name)
+            if not os.path.exists(full_path):
+                missing.append(idx)
+                missing_paths.append(full_path)
+            results.append({"filename": file_name, "subfolder": "", "type": "temp"})
+
+        if missing:
+            src = frames if len(missing) == frames.shape[0] else frames[missing]
+            thumbs = downscale_frames(src, preview_size)
+            save_previews([(thumb, path, preview_format) for thumb, path in zip(thumbs, missing_paths)])
+        return results
+
+    def previews_exist(self, result):
+        for key in ("a_images", "b_images"):
+            for item in result["ui"][key]:
+                folder = folder_paths.get_temp_directory() if item.get("type") == "temp" else folder_paths.get_output_directory()
+                if not os.path.exists(os.path.join(folder, item.get("subfolder", ""), item["filename"])):
+                    return False
+        return True
+
     def compare_images(self,
                      foreground_image=None,
                      background_image=None,
+                     preview_mode="All",
+                     frame_index=0,
+                     preview_size=0,
+                     preview_format="png",
+                     metrics=False,
                      filename_prefix="pix.compare.",
                      prompt=None,
                      extra_pnginfo=None):
 
+        inputs = {}
+        if foreground_image is not None and len(foreground_image) > 0:
+            inputs["a_images"] = self.select_frames(foreground_image, preview_mode, frame_index)
+        if background_image is not None and len(background_image) > 0:
+            inputs["b_images"] = self.select_frames(background_image, preview_mode, frame_index)
+
+        # 指标需要两组输入，且开启 metrics
+        want_metrics = metrics and foreground_image is not None and background_image is not None \
+            and len(foreground_image) > 0 and len(background_image) > 0
+
+        # 输入指纹：在循环中反复执行时，内容与参数均未变化则跳过全部编码
+        key = (
+            tuple((name, frame_fingerprint(frames)) for name, frames in inputs.items()),
+            preview_mode, frame_index, preview_size, preview_format,
+        )
+        if want_metrics:
+            # 指标基于完整批次 (不受 preview_mode 影响)
+            key += (frame_fingerprint(to_cpu_frames(foreground_image)), frame_fingerprint(to_cpu_frames(background_image)))
+        if key == self.last_key and self.last_result is not None and self.previews_exist(self.last_result):
+            return self.last_result
+
         # 构造返回给前端的数据结构
         # 为了兼容前端逻辑，我们依然使用 a_images 和 b_images 作为键名
         # 但数据来源已经变更为新的参数名
-        result = { "ui": { "a_images":[], "b_images": [] } }
+        result = { "ui": { "a_images":[], "b_images": [] }, "result": self.empty_outputs() }
 
-        # 保存 foreground_image (FG)
-        if foreground_image is not None and len(foreground_image) > 0:
-            saved_fg = self.save_images(foreground_image, filename_prefix, prompt, extra_pnginfo)
-            result['ui']['a_images'] = saved_fg['ui']['images']
+        # 默认设置 (全部帧、原尺寸、png) 保持 ComfyUI 标准预览行为，其余走快速预览
+        standard = preview_size == 0 and preview_format == "png"
+        for name, frames in inputs.items():
+            if standard:
+                saved = self.save_images(frames, filename_prefix, prompt, extra_pnginfo)
+                result['ui'][name] = saved['ui']['images']
+            else:
+                side = "a" if name == "a_images" else "b"
+                result['ui'][name] = self.write_fast_previews(frames, side, preview_size, preview_format, filename_prefix)
 
-        # 保存 background_image (BG)
-        if background_image is not None and len(background_image) > 0:
-            saved_bg = self.save_images(background_image, filename_prefix, prompt, extra_pnginfo)
-            result['ui']['b_images'] = saved_bg['ui']['images']
+        # 差异热力图与指标：整批一次张量运算，在输入所在设备上执行
+        if want_metrics:
+            heatmap, pair_metrics = compare_metrics(foreground_image, background_image)
+            count = len(pair_metrics)
+            mean = lambda name: sum(m[name] for m in pair_metrics) / count
+            # 前端按预览中的帧顺序显示，Selected 模式只回传对应的一对
+            if preview_mode == "Selected":
+                index = min(frame_index, count - 1)
+                result["ui"]["metrics"] = pair_metrics[index:index + 1]
+            else:
+                result["ui"]["metrics"] = pair_metrics
+            result["result"] = (heatmap, mean("mse"), mean("psnr"), mean("ssim"), json.dumps(pair_metrics))
 
+        self.last_key = key
+        self.last_result = result
         return result
 
+    def empty_outputs(self):
+        return (torch.zeros((1, 64, 64, 3)), 0.0, 0.0, 0.0, "[]")
+
 # 节点映射
 NODE_CLASS_MAPPINGS = {
     "Pix_ImageComparer": ImageComparer
@@ -62,4 +255,4 @@ NODE_CLASS_MAPPINGS = {
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "Pix_ImageComparer": "Image Comparer (PixNodes)"
-}
\ No newline at end of file
+}
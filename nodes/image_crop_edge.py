@@ -4,6 +4,7 @@ class Pix_ImageCropEdge:
     """
     Pix_ImageCropEdge: 解析 crop_size 字符串并裁剪图像边缘。
     支持单值 (10) 或多值 (10,20,10,5 -> 上,下,左,右)。
+    Auto 模式下自动检测整批帧的纯色边框 (黑边/信箱/柱状边)，按并集或交集裁剪。
     """
     def __init__(self):
         pass
@@ -14,6 +15,14 @@ class Pix_ImageCropEdge:
             "required": {
                 "image": ("IMAGE",),
                 "crop_size": ("STRING", {"default": "0", "multiline": False, "placeholder": "Top,Bottom,Left,Right (e.g.: 10,20,30,40)"}),
+            },
+            "optional": {
+                # Manual: 仅按 crop_size 裁剪
+                # Auto (Union): 保留所有帧的内容区域 (裁得少)；Auto (Intersection): 去掉所有帧的边框 (裁得多)
+                # Auto 模式下 crop_size 作为在检测结果之上的额外裁剪量
+                "mode": (["Manual", "Auto (Union)", "Auto (Intersection)"], {"default": "Manual"}),
+                # 行/列像素标准差低于该值视为纯色边框 (0-1 量程)
+                "tolerance": ("FLOAT", {"default": 0.02, "min": 0.0, "max": 1.0, "step": 0.005}),
             }
         }
 
@@ -21,7 +30,38 @@ class Pix_ImageCropEdge:
     FUNCTION = "crop_edges"
     CATEGORY = "PixNodes"
 
-    def crop_edges(self, image, crop_size):
+    def detect_borders(self, image, tolerance, union):
+        """
+        一次向量化扫描检测整批帧的纯色边框，返回 (top, bottom, left, right) 的裁剪量。
+        每帧按通道计算逐行、逐列的像素标准差 (取各通道最大值，彩色纯色边框同样可检测)，
+        从四边向内找到第一条非纯色的行/列；
+        union=True 取所有帧内容框的并集，否则取交集。
+        """
+        batch_size, height, width, channels = image.shape
+
+        # [B, H] / [B, W]：True 表示该行/列含有内容 (非纯色)
+        row_content = image.std(dim=2).amax(dim=2) > tolerance
+        col_content = image.std(dim=1).amax(dim=2) > tolerance
+
+        def first_true(mask):
+            # argmax 返回第一个 True 的下标；整行全 False (纯色帧) 时返回 0
+            return mask.int().argmax(dim=1)
+
+        top = first_true(row_content)
+        bottom = first_true(row_content.flip(1))
+        left = first_true(col_content)
+        right = first_true(col_content.flip(1))
+
+        # 纯色帧 (没有任何内容行/列) 不参与统计
+        valid = row_content.any(dim=1) & col_content.any(dim=1)
+        if not valid.any():
+            return 0, 0, 0, 0
+        top, bottom, left, right = (t[valid] for t in (top, bottom, left, right))
+
+        reduce = torch.min if union else torch.max
+        return tuple(int(reduce(t)) for t in (top, bottom, left, right))
+
+    def crop_edges(self, image, crop_size, mode="Manual", tolerance=0.02):
         # image 形状为 [B, H, W, C]
         batch_size, height, width, channels = image.shape
 
@@ -45,6 +85,14 @@ class Pix_ImageCropEdge:
             if len(parts) > 1: c_bottom = max(0, parts[1])
             if len(parts) > 2: c_left = max(0, parts[2])
             if len(parts) > 3: c_right = max(0, parts[3])
+
+        # 自动检测边框，crop_size 作为额外裁剪量叠加
+        if mode.startswith("Auto"):
+            a_top, a_bottom, a_left, a_right = self.detect_borders(image, tolerance, union=(mode == "Auto (Union)"))
+            c_top += a_top
+            c_bottom += a_bottom
+            c_left += a_left
+            c_right += a_right
         
         # 计算裁剪索引（安全边界检查）
         y_start = min(c_top, height)
@@ -53,7 +101,7 @@ class Pix_ImageCropEdge:
         x_start = min(c_left, width)
         x_end = max(width - c_right, x_start)
 
-        # 执行张量切片
+        # 执行张量切片 (整批共用同一裁剪框，结果为原张量的视图，不产生拷贝)
         cropped_image = image[:, y_start:y_end, x_start:x_end, :]
 
         # 极端情况处理
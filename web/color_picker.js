@@ -565,6 +565,19 @@ app.registerExtension({
             // 初始化 (针对拖入创建节点)
             syncUIFromWidgets();
 
+            // [兼容] 旧版工作流没有 swatch_size，widgets_values 中该位置是颜色面板 (DOM Widget) 的值，
+            //    按位置恢复会错位，这里在 blue 之后补上默认值
+            const wSwatch = this.widgets.find((w) => w.name === "swatch_size");
+            const origConfigure = this.configure;
+            this.configure = function (info) {
+                const values = info && info.widgets_values;
+                const swatchIndex = wSwatch ? this.widgets.indexOf(wSwatch) : -1;
+                if (Array.isArray(values) && swatchIndex >= 0 && typeof values[swatchIndex] !== "number") {
+                    values.splice(swatchIndex, 0, wSwatch.value);
+                }
+                if (origConfigure) return origConfigure.apply(this, arguments);
+            };
+
             // --- 5. 修复：添加 onConfigure 钩子 (针对网页刷新/加载工作流) ---
             const onConfigure = node.onConfigure;
             node.onConfigure = function () {
@@ -1005,6 +1005,19 @@ app.registerExtension({
                 // 在节点加载或刷新时，ComfyUI 会调用 configure 方法
                 const origConfigure = this.configure;
                 this.configure = function(info) {
+                    // 0. [兼容] 旧版工作流保存时还没有后来新增的原生 Widget (如 workers)，
+                    //    widgets_values 按位置恢复会把 image_data 错位写进新 Widget。
+                    //    这里找到旧数据中 image_data 的位置，在其前面补上新 Widget 的默认值。
+                    const values = info && info.widgets_values;
+                    const dataIndex = this.widgets.findIndex(w => w.name === "image_data");
+                    if (Array.isArray(values) && dataIndex >= 0) {
+                        const legacyIndex = values.findIndex((v, i) => i >= 4 && typeof v === "string" && v.trim().startsWith("["));
+                        if (legacyIndex >= 0 && legacyIndex < dataIndex) {
+                            const defaults = this.widgets.slice(legacyIndex, dataIndex).map(w => w.value);
+                            values.splice(legacyIndex, 0, ...defaults);
+                        }
+                    }
+
                     // 1. 执行原始的 configure 逻辑
                     if (origConfigure) origConfigure.apply(this, arguments);
                     
@@ -847,7 +847,8 @@ const performHtmlExport = async (targetElement, utils) => {
         const total = mediaElements.length;
 
         for (const el of mediaElements) {
-            const src = el.src || el.currentSrc;
+            // 分镜预览卡片若带有原尺寸图地址 (data-full-src)，优先打包原图
+            const src = el.dataset.fullSrc || el.src || el.currentSrc;
             if (!src) continue;
 
             count++;
@@ -866,6 +867,7 @@ const performHtmlExport = async (targetElement, utils) => {
                 assetsFolder.file(filename, blob);
 
                 el.src = `./assets/${filename}`;
+                delete el.dataset.fullSrc;
                 
                 if (el.tagName.toLowerCase() === 'video') {
                     el.removeAttribute('autoplay');
@@ -249,6 +249,11 @@ app.registerExtension({
             if (videoEl.src !== videoUrl) {
                 videoEl.src = videoUrl;
             }
+            // 预览正在后台复制 (pending) 时文件暂不可访问：加载失败后每秒重试，最多 60 次
+            let retries = videoInfo.pending ? 60 : 0;
+            videoEl.onerror = () => {
+                if (retries-- > 0) setTimeout(() => videoEl.load(), 1000);
+            };
             app.graph.setDirtyCanvas(true, true);
         };
     }
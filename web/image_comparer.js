@@ -113,7 +113,7 @@ class PixImageComparerWidget extends PixInteractiveWidget {
     constructor(name, node) {
         super(name);
         this.node = node;
-        this._value = { images: [] }; // 存储图片数据
+        this._value = { images: [], metrics: [] }; // 存储图片数据与每对的差异指标
         this.selected = [];           // 当前选中的两张图片对象 [ImgA, ImgB]
         this.imageCache = new Map();  // 简单的图片缓存
     }
@@ -161,6 +161,13 @@ class PixImageComparerWidget extends PixInteractiveWidget {
             y += 20; // 下移内容区
         }
 
+        // 差异指标 (开启 metrics 或连接了输出时才有)：显示当前选中的一对
+        const metrics = this._value.metrics || [];
+        if (metrics.length > 0 && this.selected[0]) {
+            this.drawMetrics(ctx, node, y, metrics[Math.min(this.selected[0].index || 0, metrics.length - 1)]);
+            y += 20;
+        }
+
         // 2. 绘制对比区域
         // 获取当前的模式 (Slide 或 Click)
         const mode = node.widgets?.find(w => w.name === "comparer_mode")?.value || "Slide";
@@ -223,6 +230,16 @@ class PixImageComparerWidget extends PixInteractiveWidget {
         });
     }
 
+    drawMetrics(ctx, node, y, m) {
+        if (!m) return;
+        ctx.font = "12px Arial";
+        ctx.textAlign = "center";
+        ctx.textBaseline = "top";
+        ctx.fillStyle = "#AAA";
+        const psnr = m.psnr >= 100 ? "∞" : m.psnr.toFixed(2);
+        ctx.fillText(`MSE ${m.mse.toExponential(2)} · PSNR ${psnr} dB · SSIM ${m.ssim.toFixed(4)}`, node.size[0] / 2, y);
+    }
+
     drawImage(ctx, node, imageObj, y, cropX = null) {
         const img = imageObj.img;
         if (!img || !img.complete || img.naturalWidth === 0) return;
@@ -307,6 +324,21 @@ app.registerExtension({
                 this.comparerWidget = new PixImageComparerWidget("pix_comparer", this);
                 this.addCustomWidget(this.comparerWidget);
 
+                // [兼容] 旧版工作流中该节点只有对比 Widget，widgets_values 只保存了对比数据；
+                //    后来新增的原生 Widget (preview_mode 等) 排在它前面，按位置恢复会错位。
+                //    这里在旧数据前补上新 Widget 的默认值。
+                const origConfigure = this.configure;
+                this.configure = function(info) {
+                    const values = info && info.widgets_values;
+                    const comparerIndex = this.widgets.indexOf(this.comparerWidget);
+                    if (Array.isArray(values) && comparerIndex > 0 && values.length < this.widgets.length) {
+                        const missing = this.widgets.length - values.length;
+                        const defaults = this.widgets.slice(0, Math.min(missing, comparerIndex)).map(w => w.value);
+                        values.splice(0, 0, ...defaults);
+                    }
+                    if (origConfigure) return origConfigure.apply(this, arguments);
+                };
+
                 // [调整] 创建时不强制设置大尺寸，让其保持最小默认尺寸
                 // this.setSize([400, 400]); 
             };
@@ -331,7 +363,8 @@ app.registerExtension({
                         images.push({
                             name: (list.length > 1) ? `${prefix}${i+1}` : prefix,
                             url: imageDataToUrl(item),
-                            type: prefix
+                            type: prefix,
+                            index: i
                         });
                     });
                 };
@@ -341,7 +374,7 @@ app.registerExtension({
 
                 // 更新 Widget
                 if (this.comparerWidget) {
-                    this.comparerWidget.value = { images };
+                    this.comparerWidget.value = { images, metrics: output.metrics || [] };
                 }
 
                 // [调整] 运行后设置为默认尺寸 400x400
@@ -422,6 +422,44 @@ app.registerExtension({
                                 }
                             }
                             videoEl.src = videoSrc;
+
+                            // 预览正在后台复制 (pending) 时文件暂不可访问：加载失败后每秒重试，最多 60 次
+                            if (item.video.pending) {
+                                let retries = 60;
+                                videoEl.onerror = () => {
+                                    if (retries-- > 0) setTimeout(() => videoEl.load(), 1000);
+                                };
+                            }
+
+                            // 低分辨率代理：卡片预览使用代理，原视频地址记录在 data-full-src 中，导出 HTML 时使用原视频
+                            if (item.video.proxy) {
+                                const proxy = item.video.proxy;
+                                const proxySrc = api.apiURL(`/view?filename=${encodeURIComponent(proxy.filename)}&type=${proxy.type}&subfolder=${encodeURIComponent(proxy.subfolder || "")}`);
+                                const useProxy = () => {
+                                    const resume = !videoEl.paused;
+                                    const time = videoEl.currentTime;
+                                    videoEl.onerror = null;
+                                    videoEl.dataset.fullSrc = videoSrc;
+                                    videoEl.src = proxySrc;
+                                    videoEl.addEventListener("loadedmetadata", () => {
+                                        if (time) videoEl.currentTime = Math.min(time, videoEl.duration || time);
+                                        if (resume) videoEl.play().catch(()=>{});
+                                    }, { once: true });
+                                };
+                                if (proxy.ready) {
+                                    useProxy();
+                                } else {
+                                    // 代理在后台转码：先播放原视频，每 3 秒检查一次代理是否可访问，最多约 10 分钟；卡片被重新渲染后停止
+                                    let checks = 200;
+                                    const poll = () => {
+                                        if (checks-- <= 0 || !videoEl.isConnected) return;
+                                        fetch(proxySrc, { method: "HEAD", cache: "no-store" })
+                                            .then(r => r.ok ? useProxy() : setTimeout(poll, 3000))
+                                            .catch(() => setTimeout(poll, 3000));
+                                    };
+                                    setTimeout(poll, 3000);
+                                }
+                            }
                         }
 
                         // 准备图片元素
@@ -430,6 +468,10 @@ app.registerExtension({
                             imgEl = document.createElement("img");
                             imgEl.className = "cover-img";
                             imgEl.src = api.apiURL(`/view?filename=${item.image.filename}&type=${item.image.type}&subfolder=${item.image.subfolder}`);
+                            // 卡片显示缩略图；存在原尺寸图时记录其地址，导出 HTML 时使用原图
+                            if (item.full_image) {
+                                imgEl.dataset.fullSrc = api.apiURL(`/view?filename=${item.full_image.filename}&type=${item.full_image.type}&subfolder=${item.full_image.subfolder}`);
+                            }
                             // 支持跨域以便 dom-to-image 截图
                             imgEl.crossOrigin = "anonymous";
                         }